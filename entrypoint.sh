@@ -2,4 +2,11 @@
 
 ./create_db.sh
 
+# Seed/re-sync maintained counters (pagination totals) so reads never have to
+flask --app 'flaskr:create_app()' refresh-counts
+
+# Apply write-behind vote deltas journaled by the previous run, also when
+# write-behind has since been switched off
+flask --app 'flaskr:create_app()' flush-votes
+
 gunicorn --threads 4 -b 0.0.0.0:8080 'flaskr:create_app()' 
@@ -1,13 +1,19 @@
 import os
+from functools import partial
 
 from werkzeug.exceptions import HTTPException
 from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_migrate import Migrate
 
-from flaskr.extensions import db, swag, jwt, sio 
-from flaskr.models import User
+from flaskr.extensions import db, swag, jwt, sio, feed_cache
 from flaskr.routes import register_routes
+from flaskr.cli import register_commands
+from flaskr.json_provider import MsgspecJSONProvider
+from flaskr.passwords import password_hasher
+from flaskr.db_pool import pool_options, install_pool_events, warm_up
+from flaskr.replicas import replica_binds, replica_router
+from flaskr.schemas import definitions
 
 from dotenv import load_dotenv
     
@@ -15,6 +21,7 @@ load_dotenv()
 
 def create_app(config_mapping: dict|None=None):
     app = Flask(__name__, instance_relative_config=True)
+    app.json = MsgspecJSONProvider(app)
     
     CORS(app, resources={r"/*": {"origins": "*"}})
 
@@ -40,6 +47,10 @@ def create_app(config_mapping: dict|None=None):
         port = os.getenv("DB_PORT", "3306")
         connection_string += f'{username}:{password}@{host}:{port}/{database}'
         app.config['SQLALCHEMY_DATABASE_URI'] = connection_string
+        # Optional read replicas, comma separated SQLAlchemy URLs
+        replica_uris = [uri for uri in os.getenv('DB_REPLICA_URIS', '').split(',') if uri]
+        if replica_uris:
+            app.config['SQLALCHEMY_BINDS'] = replica_binds(replica_uris)
 
     elif os.getenv('FLASK_ENV') in ['prod', 'production']:
         # Production on gcloud
@@ -47,9 +58,9 @@ def create_app(config_mapping: dict|None=None):
         from pymysql.connections import Connection
         app.config['FLASK_ENV'] = 'prod'
         instance_conn_name = os.getenv("INSTANCE_CONNECTION_NAME")
-        def getconn() -> Connection:
+        def getconn(instance: str = instance_conn_name) -> Connection:
             conn: Connection = connector.connect(
-                instance_conn_name,
+                instance,
                 'pymysql',
                 user=os.getenv("DB_IAM_USER"),
                 enable_iam_auth=True,
@@ -58,15 +69,48 @@ def create_app(config_mapping: dict|None=None):
             return conn
         app.config['SQLALCHEMY_ENGINE_OPTIONS'] = { "creator": getconn }
         app.config['SQLALCHEMY_DATABASE_URI'] = connection_string
+        # Optional Cloud SQL read replicas, comma separated instance connection names
+        replica_names = [
+            name for name in os.getenv('REPLICA_INSTANCE_CONNECTION_NAMES', '').split(',') if name
+        ]
+        if replica_names:
+            app.config['SQLALCHEMY_BINDS'] = replica_binds([
+                {'url': connection_string, 'creator': partial(getconn, name)}
+                for name in replica_names
+            ])
                                             
+    # Pool sizing/recycling (DB_POOL_*) for every environment; explicitly configured options win
+    engine_options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    pool_defaults = pool_options(app.config.get('SQLALCHEMY_DATABASE_URI'))
+    if 'poolclass' in engine_options:
+        pool_defaults = {'pool_pre_ping': pool_defaults['pool_pre_ping']}
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**pool_defaults, **engine_options}
+    # Connections opened at boot so the first requests don't pay for the handshake
+    app.config.setdefault('DB_POOL_WARMUP', int(os.getenv('DB_POOL_WARMUP', 0)))
+
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'super-secret-key')
     app.config['JWT_SECRET_KEY'] = os.getenv('SECRET_KEY', 'super-secret-key')
     app.config['SWAGGER'] = { 'doc_dir': './docs/' }
+    # Seconds between background hot/best rank refreshes; 0 disables (use `flask refresh-ranks`)
+    app.config.setdefault('RANK_REFRESH_INTERVAL', float(os.getenv('RANK_REFRESH_INTERVAL', 0)))
 
     db.init_app(app)
+    replica_router.init_app(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            install_pool_events(engine)
+        if app.config['DB_POOL_WARMUP'] > 0:
+            try:
+                warm_up(db.engine, app.config['DB_POOL_WARMUP'])
+            except Exception as e:
+                app.logger.warning('connection pool warm-up failed: %s', e)
     migrate = Migrate(app, db)
     swag.init_app(app)
+    # Response schemas come from the same structs the routes encode
+    swag.template.setdefault('definitions', {}).update(definitions())
     jwt.init_app(app)
+    feed_cache.init_app(app)
+    password_hasher.init_app(app)
 
     ### TODO: Move these registrations somewhere else for code cleanliness maybe
     ## Register jwt related callbacks here to prevent circular import
@@ -75,13 +119,40 @@ def create_app(config_mapping: dict|None=None):
     def user_id_cb(user):
         return str(user.user_id)
 
-    # Callback to load user from db on protected route access
+    # Revoked tokens (logout); an in-memory lookup, never a database query
+    from flaskr.services import token_blocklist
+    token_blocklist.init_app(app)
+
+    @jwt.token_in_blocklist_loader
+    def token_revoked_cb(_jwt_header, jwt_data):
+        return token_blocklist.is_revoked(jwt_data['jti'])
+
+    # Callback to load user on protected route access: from a TTL cache, or
+    # straight from the token's claims in opt-in `claims` mode
+    from flaskr.services import user_identity_cache, identity_from_claims
+    user_identity_cache.init_app(app)
+    claims_identity = app.config['USER_IDENTITY_MODE'] == 'claims'
+
     @jwt.user_lookup_loader
     def user_lookup_cb(_jwt_header, jwt_data):
-        identity = int(jwt_data['sub'])
-        return User.query.filter_by(user_id=identity).one_or_none()
+        if claims_identity:
+            identity = identity_from_claims(jwt_data)
+            if identity is not None:
+                return identity
+        return user_identity_cache.load(int(jwt_data['sub']))
     
     register_routes(app)
+    register_commands(app)
+
+    from flaskr.services import vote_buffer, user_vote_cache, fragment_cache, username_index
+    vote_buffer.init_app(app)
+    user_vote_cache.init_app(app)
+    fragment_cache.init_app(app)
+    username_index.init_app(app)
+
+    if app.config['RANK_REFRESH_INTERVAL'] > 0:
+        from flaskr.services import start_rank_refresher
+        start_rank_refresher(app, app.config['RANK_REFRESH_INTERVAL'])
 
     sio.init_app(app)
 
@@ -0,0 +1,143 @@
+"""\
+    Response caching keyed on data versions
+
+    Callers put the version of the data a response was built from into its
+    key, so writes need no invalidation: stale entries are never looked up
+    again and age out on their own. Backends follow the `cachelib.BaseCache`
+    interface (get/set/delete/clear),
+    so any cachelib cache (RedisCache in production, SimpleCache as a local
+    stand-in in tests) can be plugged in as the shared backend.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+def _sizeof(value) -> int:
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        return 64 + sum(_sizeof(v) for v in value)
+    return 64
+
+def shared_backend(backend=None, **options):
+    """`backend` if configured, else a RedisCache on CACHE_REDIS_URL, else None.
+
+    `options` are passed to RedisCache (e.g. `default_timeout`).
+    """
+    if backend is not None:
+        return backend
+    url = os.getenv('CACHE_REDIS_URL')
+    if not url:
+        return None
+    import redis
+    from cachelib import RedisCache
+    return RedisCache(host=redis.from_url(url), **options)
+
+class LocalLRUBackend:
+    """In-process LRU cache with per-entry TTL, bounded by entry count and total bytes."""
+
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 64 * 1024 * 1024,
+                 default_timeout: float = 30):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_timeout = default_timeout
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, object, int]] = OrderedDict()
+        self._bytes = 0
+
+    def _pop(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value, _ = entry
+            if expires <= time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout: float|None = None) -> bool:
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return False
+        timeout = self.default_timeout if timeout is None else timeout
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (time.monotonic() + timeout, value, size)
+            self._bytes += size
+            while (len(self._entries) > self.max_entries) or (self._bytes > self.max_bytes):
+                self._pop(next(iter(self._entries)))
+        return True
+
+    def delete(self, key) -> bool:
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._pop(key)
+            return True
+
+    def clear(self) -> bool:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        return True
+
+
+class ResponseCache:
+    """Cache of serialized responses for one namespace.
+
+    Key parts must include the version of the data behind the response.
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self.backend = None
+        self.timeout = 30
+
+    def init_app(self, app):
+        prefix = self.namespace.upper() + '_CACHE'
+        config = app.config
+        config.setdefault(f'{prefix}_ENABLED', True)
+        config.setdefault(f'{prefix}_TTL', float(os.getenv(f'{prefix}_TTL', 30)))
+        config.setdefault(f'{prefix}_MAX_ENTRIES', 2048)
+        config.setdefault(f'{prefix}_MAX_BYTES', 64 * 1024 * 1024)
+        # A cachelib-compatible instance, e.g. RedisCache; falls back to CACHE_REDIS_URL
+        config.setdefault(f'{prefix}_BACKEND', None)
+
+        self.timeout = config[f'{prefix}_TTL']
+        if not config[f'{prefix}_ENABLED']:
+            self.backend = None
+        else:
+            self.backend = shared_backend(
+                config[f'{prefix}_BACKEND'], default_timeout=self.timeout
+            ) or LocalLRUBackend(
+                max_entries=config[f'{prefix}_MAX_ENTRIES'],
+                max_bytes=config[f'{prefix}_MAX_BYTES'],
+                default_timeout=self.timeout
+            )
+        app.extensions[f'{self.namespace}_cache'] = self
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def key(self, *parts) -> str:
+        return f'{self.namespace}:' + ':'.join(str(p) for p in parts)
+
+    def get_or_set(self, parts: tuple, build):
+        """Return the cached value for `parts`, calling `build()` on a miss."""
+        if not self.enabled:
+            return build()
+        key = self.key(*parts)
+        value = self.backend.get(key)
+        if value is None:
+            value = build()
+            self.backend.set(key, value, timeout=self.timeout)
+        return value
@@ -7,6 +7,114 @@ from flask.cli import with_appcontext
 #def seed_db():
 #    seed_all()
 #    print("Database has been seeded successfully.")
-#
-#def register_commands(app):
-#    app.cli.add_command(seed_db)
\ No newline at end of file
+
+@click.command('recompute-scores')
+@with_appcontext
+def recompute_scores():
+    from flaskr.services import recompute_vote_scores
+    posts, comments = recompute_vote_scores()
+    print(f"Recomputed score for {posts} posts and {comments} comments.")
+
+@click.command('refresh-ranks')
+@click.option('--days', type=int, default=None, help='Only refresh posts created in the last N days.')
+@with_appcontext
+def refresh_ranks_cmd(days):
+    from datetime import timedelta
+    from flaskr.services import refresh_ranks
+    window = timedelta(days=days) if days else None
+    posts, comments = refresh_ranks(window)
+    print(f"Refreshed hot rank of {posts} posts and best rank of {comments} comments.")
+
+@click.command('refresh-counts')
+@with_appcontext
+def refresh_counts():
+    from flaskr.services import refresh_counters
+    for name, value in refresh_counters().items():
+        print(f"{name}: {value}")
+
+@click.command('reconcile-votes')
+@with_appcontext
+def reconcile_votes():
+    from flaskr.services import reconcile_vote_counts
+    posts, comments = reconcile_vote_counts()
+    print(f"Reconciled vote counters of {posts} posts and {comments} comments.")
+
+@click.command('flush-votes')
+@with_appcontext
+def flush_votes():
+    """Apply every journaled write-behind vote delta."""
+    from flaskr.services import vote_buffer
+    total = 0
+    while True:
+        applied = vote_buffer.flush()
+        if not applied:
+            break
+        total += applied
+    print(f"Applied {total} pending vote deltas.")
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_cmd():
+    from flaskr.services import rebuild_search_index
+    posts, comments = rebuild_search_index()
+    print(f"Indexed {posts} posts and {comments} comments.")
+
+@click.command('bench-login')
+@click.option('--username', required=True, help='An existing account to log in as.')
+@click.option('--password', required=True)
+@click.option('--requests', 'total', type=int, default=200, help='Number of logins.')
+@click.option('--threads', type=int, default=4, help='Concurrent clients, as with gunicorn --threads.')
+@with_appcontext
+def bench_login(username, password, total, threads):
+    """Login requests per second for one worker, plus feed latency during the burst.
+
+    Compare runs with PASSWORD_HASH_WORKERS=0 (hash on the request threads)
+    and the default pool, or different PASSWORD_HASH_METHOD costs.
+    """
+    import statistics
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from flask import current_app
+    app = current_app._get_current_object()
+    body = {'email': username, 'password': password}
+
+    def login(_):
+        with app.test_client() as client:
+            return client.post('/auth/login', json=body).status_code
+
+    feed_times, done = [], threading.Event()
+    def poll_feed():
+        with app.test_client() as client:
+            while not done.is_set():
+                start = time.perf_counter()
+                client.get('/social_media/?per_page=20')
+                feed_times.append(time.perf_counter() - start)
+
+    poller = threading.Thread(target=poll_feed, daemon=True)
+    start = time.perf_counter()
+    poller.start()
+    with ThreadPoolExecutor(threads) as executor:
+        codes = list(executor.map(login, range(total)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    poller.join()
+
+    failed = sum(code != 200 for code in codes)
+    print(f"method={app.config['PASSWORD_HASH_METHOD']} "
+          f"hash workers={app.config['PASSWORD_HASH_WORKERS']} threads={threads}")
+    print(f"{total} logins in {elapsed:.2f}s: {total / elapsed:.1f} logins/s ({failed} failed)")
+    if feed_times:
+        print(f"feed during burst: {len(feed_times)} requests, "
+              f"median {statistics.median(feed_times) * 1000:.1f} ms, "
+              f"max {max(feed_times) * 1000:.1f} ms")
+
+def register_commands(app):
+    #app.cli.add_command(seed_db)
+    app.cli.add_command(recompute_scores)
+    app.cli.add_command(refresh_ranks_cmd)
+    app.cli.add_command(refresh_counts)
+    app.cli.add_command(reconcile_votes)
+    app.cli.add_command(flush_votes)
+    app.cli.add_command(rebuild_search_index_cmd)
+    app.cli.add_command(bench_login)
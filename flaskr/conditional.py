@@ -0,0 +1,72 @@
+"""\
+    Conditional GET (ETag / Last-Modified) for read endpoints
+
+    A view opts in with `@conditional(version)`, where `version(*args, **kwargs)`
+    returns cheap version data for the resource (row versions, counters, ...)
+    as `(parts, last_modified)`, or None when the resource doesn't exist.
+    Unchanged resources are answered with 304 before the view builds a body.
+    `parts` must change with every write; `last_modified` may be None.
+    Stack it above `@swag_from`, which resolves relative spec paths against
+    the module of the function it decorates.
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+
+from flask import current_app, make_response, request
+
+def make_etag(parts) -> str:
+    return hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+
+def _as_utc(dt: datetime|None) -> datetime|None:
+    if dt is None:
+        return None
+    # Timestamps are stored naive in UTC; HTTP dates have one-second resolution
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.replace(microsecond=0)
+
+def _settled(last_modified: datetime|None) -> datetime|None:
+    """`last_modified`, if its whole second has passed.
+
+    A later write in the same second would keep the same timestamp, so a
+    fresher Last-Modified can't be trusted for If-Modified-Since (RFC 9110 8.8.2.2).
+    """
+    if last_modified and last_modified <= datetime.now(timezone.utc) - timedelta(seconds=1):
+        return last_modified
+    return None
+
+def is_not_modified(etag: str, last_modified: datetime|None) -> bool:
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified and request.if_modified_since:
+        return last_modified <= request.if_modified_since
+    return False
+
+def _tag(response, etag: str, last_modified: datetime|None):
+    # Weak: the version identifies the representation, not its exact bytes
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified
+    response.vary.add('Authorization')
+    return response
+
+def conditional(version):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            current = version(*args, **kwargs)
+            if current is None:
+                return view(*args, **kwargs)
+            parts, last_modified = current
+            etag, last_modified = make_etag(parts), _settled(_as_utc(last_modified))
+            if is_not_modified(etag, last_modified):
+                return _tag(current_app.response_class(status=304), etag, last_modified)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                _tag(response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
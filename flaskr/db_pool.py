@@ -0,0 +1,144 @@
+"""\
+    Connection pool tuning, warm-up and metrics
+
+    `pool_options()` turns DB_POOL_* environment variables into engine
+    options for every environment (the Cloud SQL `creator` in production, a
+    plain MySQL URL in development, SQLite in tests). `MeteredQueuePool`
+    records how long checkouts wait, which `pool_stats()` reports along with
+    the pool's own counters.
+"""
+import os
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    return default if value is None else value.lower() in ('1', 'true', 'yes')
+
+def _is_memory_sqlite(uri: str|None) -> bool:
+    return bool(uri) and uri.startswith('sqlite') and (
+        ':memory:' in uri or uri.rstrip('/') in ('sqlite:', 'sqlite+pysqlite:')
+    )
+
+def pool_options(uri: str|None) -> dict:
+    """Engine options from DB_POOL_* settings.
+
+    In-memory SQLite shares one connection (StaticPool), so only
+    pre-ping applies there.
+    """
+    options = {'pool_pre_ping': _env_flag('DB_POOL_PRE_PING', True)}
+    if _is_memory_sqlite(uri):
+        return options
+    options.update({
+        'poolclass': MeteredQueuePool,
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', 30)),
+        # Recycle before Cloud SQL / MySQL drop idle connections (wait_timeout)
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        'pool_use_lifo': _env_flag('DB_POOL_USE_LIFO', True),
+    })
+    return options
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.connects = 0
+        self.invalidations = 0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_avg_ms': round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'wait_max_ms': round(self.wait_max * 1000, 3),
+                'connects': self.connects,
+                'invalidations': self.invalidations,
+            }
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that times how long each checkout waits for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - start)
+        return conn
+
+
+def install_pool_events(engine):
+    metrics = getattr(engine.pool, 'metrics', None)
+    if metrics is None:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_conn, record):
+        metrics.connects += 1
+
+    @event.listens_for(engine, 'invalidate')
+    def _on_invalidate(dbapi_conn, record, exception):
+        metrics.invalidations += 1
+
+def warm_up(engine, connections: int) -> int:
+    """Open up to `connections` connections at once and return them to the pool."""
+    if connections <= 0:
+        return 0
+    if isinstance(engine.pool, QueuePool):
+        connections = min(connections, engine.pool.size())
+    opened = []
+    try:
+        for _ in range(connections):
+            opened.append(engine.connect())
+    finally:
+        for conn in opened:
+            conn.close()
+    return len(opened)
+
+def pool_stats(engine) -> dict:
+    pool = engine.pool
+    stats = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            # Negative while the pool hasn't opened `size` connections yet
+            'overflow': pool.overflow(),
+            'max_overflow': pool._max_overflow,
+        })
+    metrics = getattr(pool, 'metrics', None)
+    if metrics is not None:
+        stats.update(metrics.as_dict())
+    return stats
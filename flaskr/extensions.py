@@ -5,6 +5,9 @@ from flask_jwt_extended import JWTManager
 from flask_socketio import SocketIO
 from flasgger import Swagger
 
+from flaskr.cache import ResponseCache
+from flaskr.replicas import RoutingSession
+
 from google.cloud.sql.connector import Connector, IPTypes
 
 ip_type = None
@@ -13,7 +16,8 @@ if os.getenv('FLASK_ENV') in ['prod', 'production']:
     ip_type = IPTypes.PRIVATE if os.environ.get("PRIVATE_IP") else IPTypes.PUBLIC
     connector = Connector(ip_type=ip_type, refresh_strategy="LAZY")
 
-db = SQLAlchemy()
+# Sessions route replica_read service calls to the replica binds, if any
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 swag = Swagger(
     template_file=os.path.join(
         os.getcwd(), 'flaskr', 'docs', 'template.yml'
@@ -23,6 +27,9 @@ swag = Swagger(
 
 jwt = JWTManager()
 
+# Serialized anonymous feed pages, keyed by page version (see _shared_feed_page)
+feed_cache = ResponseCache('feed')
+
 ## SocketIO stuff
 sio = SocketIO(
     ping_timeout=60,
@@ -1,16 +1,20 @@
 from .address import Address, City, Country
 from .user import User
 from .social_media import Post, Comment
-from .votes import PostVotes, CommentVotes
+from .votes import PostVotes, CommentVotes, PendingVoteDelta
 from .notification import Notification
 from .chat import Chat, Message
 from .audit import UserAudit
+from .counter import RowCounter
+from .search import post_fts, comment_fts
 
 __all__ = ['Address', 'City', 'Country',
            'User', 
            'Post', 'Comment', 
-           'PostVotes', 'CommentVotes',
+           'PostVotes', 'CommentVotes', 'PendingVoteDelta',
            'Notification', 
            'Chat', 'Message',
-           'UserAudit'
+           'UserAudit',
+           'RowCounter',
+           'post_fts', 'comment_fts'
            ]
\ No newline at end of file
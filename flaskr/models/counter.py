@@ -0,0 +1,16 @@
+from flaskr.extensions import db
+
+# Maintained row counts, so pagination totals don't need a COUNT(*) scan
+class RowCounter(db.Model):
+    __tablename__ = 'row_counter'
+
+    name = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    refreshed_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'value': self.value,
+            'refreshed_at': self.refreshed_at.isoformat() if self.refreshed_at else None
+        }
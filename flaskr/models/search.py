@@ -0,0 +1,24 @@
+"""\
+    SQLite FTS5 mirrors of post/comment text, for search off MySQL
+
+    On MySQL the FULLTEXT indexes declared on Post/Comment are used instead.
+    These virtual tables are only created on SQLite (by `db.create_all()`)
+    and are kept in sync by services/search_service.py.
+"""
+from sqlalchemy import DDL, event, table, column
+from flaskr.extensions import db
+
+# rowid is the post_id / comment_id
+post_fts = table('post_fts', column('rowid'), column('title'), column('content'))
+comment_fts = table('comment_fts', column('rowid'), column('content'), column('post_id'))
+
+_FTS_TABLES = {
+    'post_fts': "CREATE VIRTUAL TABLE IF NOT EXISTS post_fts "
+                "USING fts5(title, content, tokenize='porter unicode61')",
+    'comment_fts': "CREATE VIRTUAL TABLE IF NOT EXISTS comment_fts "
+                   "USING fts5(content, post_id UNINDEXED, tokenize='porter unicode61')",
+}
+
+for name, create in _FTS_TABLES.items():
+    event.listen(db.metadata, 'after_create', DDL(create).execute_if(dialect='sqlite'))
+    event.listen(db.metadata, 'after_drop', DDL(f'DROP TABLE IF EXISTS {name}').execute_if(dialect='sqlite'))
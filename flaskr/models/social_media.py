@@ -3,6 +3,16 @@ from flaskr.extensions import db
 
 class Post(db.Model):
     __tablename__ = 'post'
+    __table_args__ = (
+        # Keyset pagination seeks on (sort column, post_id)
+        db.Index('ix_post_created_at_post_id', 'created_at', 'post_id'),
+        db.Index('ix_post_updated_at_post_id', 'updated_at', 'post_id'),
+        db.Index('ix_post_score_post_id', 'score', 'post_id'),
+        db.Index('ix_post_hot_rank_post_id', 'hot_rank', 'post_id'),
+        # Search; SQLite uses the FTS5 tables in models/search.py instead
+        db.Index('ft_post_title_content', 'title', 'content', 
+                 mysql_prefix='FULLTEXT').ddl_if(dialect=('mysql', 'mariadb')),
+    )
 
     post_id = db.Column(db.Integer, primary_key=True)
     temp_id = db.Column(db.String(36), nullable=True, unique=True, default=uuid.uuid4)
@@ -11,6 +21,18 @@ class Post(db.Model):
     content = db.Column(db.Text, nullable=True)
     upvotes_cnt = db.Column(db.Integer, default=0, nullable=False)
     dnvotes_cnt = db.Column(db.Integer, default=0, nullable=False)
+    # upvotes_cnt - dnvotes_cnt, maintained by the vote helpers so feeds can sort on it in SQL
+    score = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    # Reddit-style hot score, see services/ranking.py
+    hot_rank = db.Column(db.Double, default=0, server_default='0', nullable=False)
+    # Maintained by create_comment/delete_comment so comment totals never need a COUNT
+    comment_cnt = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    # Bumped by every write that changes the rendered post (edits, votes, comment
+    # count); `updated_at` has one-second resolution, so ETags build on this
+    version = db.Column(db.Integer, default=1, server_default='1', nullable=False)
+    # Bumped whenever any of the post's comments gets a new `version`, so a
+    # page's comment state is versioned without scanning its comments
+    comments_version = db.Column(db.Integer, default=1, server_default='1', nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
 
@@ -28,6 +50,7 @@ class Post(db.Model):
             'content': self.content,
             'up_votes': self.upvotes_cnt,
             'down_votes': self.dnvotes_cnt,
+            'comment_count': self.comment_cnt,
             'created_at': self.created_at,
             'updated_at': self.updated_at,
             'author': author
@@ -39,6 +62,16 @@ class Post(db.Model):
 
 class Comment(db.Model):
     __tablename__ = 'comment'
+    __table_args__ = (
+        # Comments are always listed per post, so lead with post_id
+        db.Index('ix_comment_post_id_score_comment_id', 'post_id', 'score', 'comment_id'),
+        db.Index('ix_comment_post_id_best_rank_comment_id', 'post_id', 'best_rank', 'comment_id'),
+        # MAX(updated_at) lookups for conditional GETs, feed-wide and per post
+        db.Index('ix_comment_updated_at', 'updated_at'),
+        db.Index('ix_comment_post_id_updated_at', 'post_id', 'updated_at'),
+        db.Index('ft_comment_content', 'content', 
+                 mysql_prefix='FULLTEXT').ddl_if(dialect=('mysql', 'mariadb')),
+    )
 
     comment_id = db.Column(db.Integer, primary_key=True)
     temp_id = db.Column(db.String(36), nullable=True, unique=True, default=uuid.uuid4)
@@ -47,6 +80,12 @@ class Comment(db.Model):
     content = db.Column(db.Text, nullable=False)
     upvotes_cnt = db.Column(db.Integer, default=0, nullable=False)
     dnvotes_cnt = db.Column(db.Integer, default=0, nullable=False)
+    # upvotes_cnt - dnvotes_cnt, maintained by the vote helpers
+    score = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    # Wilson score lower bound of the upvote ratio, see services/ranking.py
+    best_rank = db.Column(db.Double, default=0, server_default='0', nullable=False)
+    # Bumped by every write that changes the rendered comment (edits, votes)
+    version = db.Column(db.Integer, default=1, server_default='1', nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
 
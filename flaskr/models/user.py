@@ -1,5 +1,5 @@
-from werkzeug.security import generate_password_hash, check_password_hash
 from flaskr.extensions import db
+from flaskr.passwords import password_hasher
 from flaskr.struct import AccountType
 
 class User(db.Model):
@@ -22,7 +22,7 @@ class User(db.Model):
 
     def __init__(self, username, password, address_id=None, account_type=AccountType.REGULAR):
         self.username = username
-        self.password = generate_password_hash(password)
+        self.password = password_hasher.hash(password)
         self.address_id = address_id
         self.account_type = account_type
 
@@ -35,8 +35,13 @@ class User(db.Model):
             return None
         
         user = cls.query.filter_by(username=username).first()
-        if not (user and check_password_hash(user.password, password)):
+        if not (user and password_hasher.verify(user.password, password)):
             return None
+
+        # Upgrade hashes made with an older method/cost while we have the plaintext
+        if password_hasher.needs_rehash(user.password):
+            user.password = password_hasher.hash(password)
+            db.session.commit()
         
         return user
 
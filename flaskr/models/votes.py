@@ -35,4 +35,18 @@ class CommentVotes(db.Model):
             'user_id': self.user_id,
             'vote_direction': self.vote_direction.value
         }
-        return result
\ No newline at end of file
+        return result
+
+# Counter deltas of committed votes that the write-behind flush hasn't applied
+# yet (see services/vote_buffer.py); written in the vote's own transaction
+class PendingVoteDelta(db.Model):
+    __tablename__ = 'pending_vote_delta'
+
+    delta_id = db.Column(db.Integer, primary_key=True)
+    # 'post' or 'comment'
+    target = db.Column(db.String(16), nullable=False)
+    target_id = db.Column(db.Integer, nullable=False)
+    d_up = db.Column(db.Integer, nullable=False)
+    d_dn = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (db.Index('ix_pending_vote_delta_target', 'target', 'target_id'),)
@@ -0,0 +1,69 @@
+"""\
+    Password hashing off the request threads
+
+    werkzeug's hash functions are deliberately CPU-heavy and hold the GIL, so
+    a burst of logins would stall every other request in the worker. Here they
+    run in a small process pool; the calling thread just waits on the result.
+"""
+import atexit
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+def _method_of(pwhash: str) -> str:
+    return pwhash.split('$', 1)[0]
+
+class PasswordHasher:
+    def __init__(self):
+        # werkzeug method string, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:1000000'
+        self.method = 'scrypt'
+        self.timeout = 30.0
+        self._current = None
+        self._pool = None
+
+    def init_app(self, app):
+        config = app.config
+        config.setdefault('PASSWORD_HASH_METHOD', os.getenv('PASSWORD_HASH_METHOD', 'scrypt'))
+        # 0 hashes inline on the request thread (tests, one-off scripts)
+        config.setdefault('PASSWORD_HASH_WORKERS', int(os.getenv('PASSWORD_HASH_WORKERS', 2)))
+        config.setdefault('PASSWORD_HASH_TIMEOUT', 30.0)
+
+        self.method = config['PASSWORD_HASH_METHOD']
+        self.timeout = config['PASSWORD_HASH_TIMEOUT']
+        # werkzeug fills in default cost parameters; hash once to learn the full method string
+        self._current = _method_of(generate_password_hash('', self.method))
+        self.shutdown()
+        if config['PASSWORD_HASH_WORKERS'] > 0:
+            # spawn: never fork a threaded gunicorn worker
+            self._pool = ProcessPoolExecutor(
+                max_workers=config['PASSWORD_HASH_WORKERS'],
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            atexit.register(self.shutdown)
+        app.extensions['password_hasher'] = self
+
+    def _run(self, fn, *args):
+        if self._pool is None:
+            return fn(*args)
+        return self._pool.submit(fn, *args).result(timeout=self.timeout)
+
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash: str, password: str) -> bool:
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        """True when `pwhash` was made with a different method or cost than configured."""
+        if self._current is None:
+            self._current = _method_of(generate_password_hash('', self.method))
+        return _method_of(pwhash) != self._current
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+password_hasher = PasswordHasher()
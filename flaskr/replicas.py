@@ -0,0 +1,178 @@
+"""\
+    Read-replica routing
+
+    Replicas are SQLAlchemy binds named `replica`, `replica_1`, ... Service
+    functions wrapped in `replica_read` run their SELECTs on one replica per
+    session transaction; everything else (flushes, DML, SELECT ... FOR UPDATE,
+    calls outside `replica_read`) goes to the primary. A user who has just
+    committed a write reads from the primary for REPLICA_STICKY_SECONDS, so
+    their own vote or comment is never missing because of replication lag.
+"""
+import contextvars
+import functools
+import inspect
+import os
+import random
+import threading
+import time
+
+from flask import has_request_context
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+from flaskr.cache import shared_backend
+
+_reading = contextvars.ContextVar('replica_read', default=False)
+
+def replica_binds(targets: list) -> dict:
+    """SQLALCHEMY_BINDS entries for replica URIs (or bind option dicts), in order."""
+    return {
+        'replica' if i == 0 else f'replica_{i}': target for i, target in enumerate(targets)
+    }
+
+def _reading_iter(gen):
+    try:
+        while True:
+            token = _reading.set(True)
+            try:
+                item = next(gen)
+            except StopIteration:
+                return
+            finally:
+                _reading.reset(token)
+            yield item
+    finally:
+        gen.close()
+
+def replica_read(fn):
+    """Let `fn`'s queries go to a replica.
+
+    A generator `fn` returns keeps reading from the replica while it is
+    iterated, e.g. by a streamed response after the view has returned.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _reading.set(True)
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            _reading.reset(token)
+        return _reading_iter(result) if inspect.isgenerator(result) else result
+    return wrapper
+
+def _current_user() -> str|None:
+    if not has_request_context():
+        return None
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        # No JWT was verified for this request
+        return None
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self.binds: tuple[str, ...] = ()
+        self.sticky_seconds = 5.0
+        self.backend = None
+        self._lock = threading.Lock()
+        self._written: dict[str, float] = {}
+
+    def init_app(self, app):
+        config = app.config
+        # Seconds a writer's reads stay on the primary; cover the replicas' usual lag
+        config.setdefault('REPLICA_STICKY_SECONDS', float(os.getenv('REPLICA_STICKY_SECONDS', 5)))
+        # A cachelib-compatible instance shared by workers; falls back to CACHE_REDIS_URL
+        config.setdefault('REPLICA_STICKY_BACKEND', None)
+
+        self.binds = tuple(sorted(
+            key for key in (config.get('SQLALCHEMY_BINDS') or {})
+            if key and key.startswith('replica')
+        ))
+        self.sticky_seconds = config['REPLICA_STICKY_SECONDS']
+        # Only consulted when there are replicas to route to
+        self.backend = shared_backend(config['REPLICA_STICKY_BACKEND']) if self.binds else None
+        with self._lock:
+            self._written.clear()
+        app.extensions['replica_router'] = self
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.binds)
+
+    @staticmethod
+    def _key(user: str) -> str:
+        return f'sticky:{user}'
+
+    def mark_written(self, user: str):
+        if not self.enabled or self.sticky_seconds <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._written) > 10000:
+                self._written = {u: t for u, t in self._written.items() if t > now}
+            self._written[user] = now + self.sticky_seconds
+        if self.backend is not None:
+            self.backend.set(self._key(user), 1, timeout=max(int(self.sticky_seconds), 1))
+
+    def is_sticky(self, user: str|None) -> bool:
+        if user is None:
+            return False
+        if self._written.get(user, 0) > time.monotonic():
+            return True
+        return self.backend is not None and self.backend.has(self._key(user))
+
+    def choose(self) -> str|None:
+        """Bind key of the replica for the next read transaction, or None for the primary."""
+        if not self.enabled or self.is_sticky(_current_user()):
+            return None
+        return random.choice(self.binds)
+
+replica_router = ReplicaRouter()
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and _reading.get() and replica_router.enabled:
+            key = self._replica_key(clause)
+            if key is not None:
+                return self._db.engines[key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica_key(self, clause) -> str|None:
+        if (
+            self._flushing
+            or not getattr(clause, 'is_select', False)
+            or getattr(clause, '_for_update_arg', None) is not None
+        ):
+            return None
+        # Anything this transaction changed is only visible on the primary
+        if self.new or self.dirty or self.deleted or self.info.get('wrote'):
+            return None
+        # One replica per transaction, so related reads see one consistent snapshot
+        if 'replica' not in self.info:
+            self.info['replica'] = replica_router.choose()
+        return self.info['replica']
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(session, flush_context):
+    session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _on_execute(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _after_commit(session):
+    session.info.pop('replica', None)
+    if session.info.pop('wrote', False):
+        user = _current_user()
+        if user is not None:
+            replica_router.mark_written(str(user))
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('replica', None)
+    session.info.pop('wrote', None)
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
-from flaskr.services import user_id_credentials
+from flask_jwt_extended import jwt_required, get_jwt
+from flaskr.services import user_id_credentials, revoke_token
 from flasgger import swag_from
 
 auth_bp = Blueprint('auth_bp', __name__, url_prefix='/auth')
@@ -20,4 +21,11 @@ def login():
     return jsonify({
         "error": "Invalid credentials",
         "authenticated": False
-    }), 401
\ No newline at end of file
+    }), 401
+
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required()
+@swag_from('../docs/auth_routes/logout.yml')
+def logout():
+    revoke_token(get_jwt())
+    return jsonify({"message": "Logged out"}), 200
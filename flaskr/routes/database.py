@@ -1,5 +1,9 @@
 from flask import Blueprint, jsonify
 from flaskr.models import User, Post, Comment, Notification, Chat, Message, UserAudit
+from flaskr.services import iter_users
+from flaskr.streaming import stream_json
+from flaskr.db_pool import pool_stats
+from flaskr.extensions import db
 from flasgger import swag_from
 
 database_bp = Blueprint("database", __name__)
@@ -7,6 +11,11 @@ database_bp = Blueprint("database", __name__)
 @database_bp.route('/', methods=['GET'])
 @swag_from('../docs/database/fetch_tables.yml')
 def fetch_tables():
-    users = User.query.all()
-    user_list = [user.to_dict() for user in users]
-    return jsonify(user_list)
\ No newline at end of file
+    return stream_json(iter_users())
+
+@database_bp.route('/pool', methods=['GET'])
+@swag_from('../docs/database/pool_stats.yml')
+def get_pool_stats():
+    return jsonify({
+        bind or 'default': pool_stats(engine) for bind, engine in db.engines.items()
+    })
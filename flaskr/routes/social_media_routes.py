@@ -1,23 +1,56 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, current_app, g, jsonify, request
 from flask_jwt_extended import jwt_required, current_user
-from flaskr.models import User
-from flaskr.services import get_comments_of_post_auth, get_all_posts, delete_post, \
+from flaskr.services import render_all_posts, delete_post, \
+    get_comments_page_of_post, get_post_detail, get_user_votes, \
     delete_comment, update_comment, update_post, create_comment, create_post, \
-    handle_post_vote, handle_comment_vote, get_all_posts_auth, \
+    handle_post_vote, handle_comment_vote, handle_bulk_votes, get_all_posts_auth, \
+    feed_version, page_comment_ids, post_version, iter_comments_of_post, search, \
     USER_NOT_AUTHORIZED, UnauthorizedError
 from flaskr.struct import VoteDirection
+from flaskr.schemas import VoteCountsOut, UserVotesOut
+from flaskr.extensions import feed_cache
+from flaskr.conditional import conditional, make_etag
+from flaskr.streaming import stream_json
 from flasgger import swag_from
 
 social_media_bp = Blueprint('social_media', __name__)
 
-@social_media_bp.route('/', methods=['GET'], strict_slashes=False)
-@jwt_required(optional=True)
-@swag_from('../docs/social_media_routes/get_posts.yml')
-def get_posts():
+def _shared_feed_page(sort_by, order, page, per_page, cursor):
+    """Cached (body, post_ids, comment_ids) of the anonymous feed page.
+
+    Keyed on the page version `_feed_version` read in this request, so writes
+    only retire the pages they change, and a body is never shared under a
+    version newer than the data it was built from. The version and body are
+    read in one transaction on the same replica, so a lagging replica's page
+    is keyed on its own older version and never served to a reader whose
+    version came from the primary.
+    """
+    def build():
+        return render_all_posts(sort_by=sort_by, order=order, page=page, 
+                                per_page=per_page, cursor=cursor)
+    version = g.get('feed_page_version')
+    if version is None:
+        return build()
+    return feed_cache.get_or_set((sort_by, order, page, per_page, cursor, make_etag(version)), build)
+
+def _splice_json(body: bytes, **fields) -> bytes:
+    """Append top-level fields to a serialized JSON object without re-encoding it."""
+    extra = current_app.json.dumps_bytes(fields).strip()[1:-1]
+    return body.rstrip()[:-1] + b',' + extra + b'}'
+
+def _flag(value: str|None) -> bool:
+    return (value or '').lower() in ('1', 'true', 'yes')
+
+def _viewer_id() -> int|None:
+    return current_user.user_id if current_user else None
+
+def _feed_args() -> tuple[str, str, int, int, str|None]:
     sort_by = request.args.get('sort_by', 'created_at')
     order = request.args.get('order', 'desc')
-    page = request.args.get('page', 1)
-    per_page = request.args.get('per_page', 20)
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+    # Presence of `cursor` (even empty, for the first page) selects keyset pagination
+    cursor = request.args.get('cursor')
 
     # Validate pagination parameters
     if page < 1:
@@ -26,33 +59,132 @@ def get_posts():
         per_page = 20
     if per_page > 100:  # Prevent overly large requests
         per_page = 100
+    return sort_by, order, page, per_page, cursor
 
+def _feed_version():
+    args, viewer_id = _feed_args(), _viewer_id()
     try:
-        if current_user:
+        parts, post_ids = feed_version(*args, user_id=viewer_id)
+        g.feed_page_version = parts
+        viewer_votes = None
+        if viewer_id is not None:
+            # Logged-in responses carry the caller's votes, so the tag is per
+            # viewer; served from the vote cache for active users
+            viewer_votes = get_user_votes(viewer_id, post_ids, _page_comment_ids(args, post_ids))
+    except ValueError:
+        # Invalid arguments (or too many ids); the view answers for itself
+        return None
+    # Pages shift with any insert or delete, so no Last-Modified: ETags only
+    return (parts, viewer_votes, viewer_id), None
+
+def _page_comment_ids(args, post_ids) -> list[int]:
+    sort_by = args[0]
+    if sort_by == 'user_vote':
+        # Ordered per viewer, so not a shared page
+        return page_comment_ids(post_ids)
+    # Same page version, same posts: the shared page has the comment ids
+    _, _, comment_ids = _shared_feed_page(*args)
+    return comment_ids
+
+def _post_version(post_id):
+    viewer_id = _viewer_id()
+    current = post_version(post_id, viewer_id)
+    if current is None:
+        return None
+    parts, viewer_parts, last_modified = current
+    # The caller's own votes don't touch `updated_at` until write-behind counters flush
+    return (parts, viewer_parts, viewer_id), (last_modified if viewer_id is None else None)
+
+@social_media_bp.route('/', methods=['GET'], strict_slashes=False)
+@jwt_required(optional=True)
+@conditional(_feed_version)
+@swag_from('../docs/social_media_routes/get_posts.yml')
+def get_posts():
+    sort_by, order, page, per_page, cursor = _feed_args()
+    # Logged-in callers can opt into the shared page plus a `user_votes` overlay
+    overlay = _flag(request.args.get('overlay'))
+
+    try:
+        if current_user and not overlay:
             posts = get_all_posts_auth(current_user.user_id, 
                                        sort_by=sort_by, 
                                        order=order,
                                        page=page,
-                                       per_page=per_page
+                                       per_page=per_page,
+                                       cursor=cursor
                                        )
             #posts = get_all_posts(sort_by=sort_by, order=order)
-            posts['user_id'] = current_user.user_id
-        else:
-            posts = get_all_posts(sort_by=sort_by, order=order, page=page, per_page=per_page)
-        return jsonify(posts), 200
+            posts.user_id = current_user.user_id
+            return jsonify(posts), 200
+
+        # Pages are identical for everyone; serve the cached body
+        body, post_ids, comment_ids = _shared_feed_page(sort_by, order, page, per_page, cursor)
+        if current_user:
+            user_votes = get_user_votes(current_user.user_id, post_ids, comment_ids)
+            body = _splice_json(body, user_id=current_user.user_id, user_votes=user_votes)
+        return Response(body, status=200, mimetype='application/json')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(e)
         return jsonify({"error": str(e)}), 500
 
+def _cursor_page_args():
+    per_page = request.args.get('per_page', 20, type=int)
+    if per_page < 1:
+        per_page = 20
+    if per_page > 100:  # Prevent overly large requests
+        per_page = 100
+    return per_page, request.args.get('cursor')
+
 @social_media_bp.route('/<int:post_id>/comments', methods=['GET'], strict_slashes=False)
 @jwt_required(optional=True)
 #@swag_from('../docs/social_media_routes/get_post_comments.yml')
 def get_post_comments(post_id):
     sort_by = request.args.get('sort_by', 'created_at')
     order = request.args.get('order', 'asc')
+    user_id = current_user.user_id if current_user else None
+    try:
+        if 'cursor' in request.args:
+            # Paginated mode; an empty cursor starts from the first page
+            per_page, cursor = _cursor_page_args()
+            comments = get_comments_page_of_post(user_id, post_id, sort_by, order, 
+                                                 per_page, cursor)
+            return jsonify(comments), 200
+        # Whole thread: streamed (JSON array, or NDJSON on request) and gzipped when accepted
+        comments = iter_comments_of_post(user_id, post_id, sort_by, order)
+        return stream_json(comments), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@social_media_bp.route('/search', methods=['GET'])
+@swag_from('../docs/social_media_routes/search.yml')
+def search_posts():
+    q = request.args.get('q', '')
+    kind = request.args.get('type', 'all').lower()
+    per_page, cursor = _cursor_page_args()
     try:
-        comments = get_comments_of_post_auth(current_user.user_id, post_id, sort_by, order)
-        return jsonify(comments), 200
+        return jsonify(search(q, kind, per_page, cursor)), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(e)
+        return jsonify({"error": str(e)}), 500
+
+@social_media_bp.route('/post/<int:post_id>', methods=['GET'])
+@jwt_required(optional=True)
+@conditional(_post_version)
+@swag_from('../docs/social_media_routes/get_post.yml')
+def get_post(post_id):
+    sort_by = request.args.get('sort_by', 'total_votes')
+    order = request.args.get('order', 'desc')
+    per_page, cursor = _cursor_page_args()
+    user_id = current_user.user_id if current_user else None
+    try:
+        post = get_post_detail(user_id, post_id, sort_by, order, per_page, cursor)
+        return jsonify(post), 200
     except ValueError as e:
         return jsonify({"error": str(e)}), 404
     except Exception as e:
@@ -182,14 +314,12 @@ def vote_post(post_id):
     except:
         return jsonify({"error": "error"}), 500
 
-    return jsonify(
-        {
-            "post_id": post_id,
-            "up_votes": up,
-            "down_votes": down,
-            "total_votes": total
-        }
-    ), 200
+    return jsonify(VoteCountsOut(
+        post_id=post_id,
+        up_votes=up,
+        down_votes=down,
+        total_votes=total
+    )), 200
 
 
 @social_media_bp.route('/comment/<int:comment_id>', methods=['POST'])
@@ -213,11 +343,56 @@ def vote_comment(comment_id):
         print(e)
         return jsonify({"error": "error"}), 500
 
-    return jsonify(
-        {
-            "comment_id": comment_id,
-            "up_votes": up,
-            "down_votes": down,
-            "total_votes": total
-        }
-    ), 200
\ No newline at end of file
+    return jsonify(VoteCountsOut(
+        comment_id=comment_id,
+        up_votes=up,
+        down_votes=down,
+        total_votes=total
+    )), 200
+
+
+@social_media_bp.route('/votes', methods=['POST'])
+@jwt_required()
+@swag_from('../docs/social_media_routes/bulk_votes.yml')
+def bulk_votes():
+    data = request.get_json(silent=True) or {}
+    entries = data.get("votes")
+    if not isinstance(entries, list) or not entries:
+        return jsonify({"error": "votes must be a non-empty list"}), 400
+
+    votes = []
+    for entry in entries:
+        try:
+            kind = str(entry.get("type")).lower()
+            ident = int(entry.get("id"))
+            vote = str(entry.get("vote")).lower()
+        except (AttributeError, TypeError, ValueError):
+            return jsonify({"error": f"Invalid vote entry: {entry}"}), 400
+        if vote not in ('up', 'down'):
+            return jsonify({"error": f"Invalid vote direction: {vote}"}), 400
+        votes.append((kind, ident, VoteDirection(vote)))
+
+    try:
+        result = handle_bulk_votes(current_user.user_id, votes)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(e)
+        return jsonify({"error": "error"}), 500
+    return jsonify(result), 200
+
+@social_media_bp.route('/votes', methods=['GET'])
+@jwt_required()
+@swag_from('../docs/social_media_routes/get_user_votes.yml')
+def get_votes_overlay():
+    try:
+        post_ids = [int(i) for i in request.args.get('post_ids', '').split(',') if i]
+        comment_ids = [int(i) for i in request.args.get('comment_ids', '').split(',') if i]
+    except ValueError:
+        return jsonify({"error": "post_ids and comment_ids must be comma separated integers"}), 400
+
+    try:
+        user_votes = get_user_votes(current_user.user_id, post_ids, comment_ids)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(UserVotesOut(user_id=current_user.user_id, user_votes=user_votes)), 200
\ No newline at end of file
@@ -1,14 +1,28 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, current_user
 from flask_jwt_extended.exceptions import NoAuthorizationError
-from flaskr.services import get_user_info_by_id, UnauthorizedError, USER_NOT_AUTHORIZED
+from flaskr.services import get_user_info_by_id, user_version, search_usernames, \
+    UnauthorizedError, USER_NOT_AUTHORIZED
+from flaskr.conditional import conditional
 from flasgger import swag_from
 from flaskr.extensions import db
 
 user_bp = Blueprint('user_bp', __name__)
+
+@user_bp.route('/search', methods=['GET'])
+@swag_from('../docs/user_routes/search_users.yml')
+def search_users():
+    prefix = request.args.get('prefix', '')
+    limit = request.args.get('limit', 10, type=int)
+    try:
+        return jsonify(search_usernames(prefix, limit)), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
 @user_bp.route('/<int:user_id>', methods=['GET'])
 #@jwt_required()
 #@swag_from('../docs/user_routes/get_user_info_by_id.yml')
+@conditional(user_version)
 def get_user_by_id(user_id):
     try:
         user_info = get_user_info_by_id(user_id)
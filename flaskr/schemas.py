@@ -0,0 +1,199 @@
+"""\
+    Typed response shapes, encoded natively by the msgspec JSON provider
+
+    The same structs are rendered as JSON Schema into the Swagger
+    `definitions` (see `definitions()`), so docs and responses share one source.
+    Fields defaulting to UNSET are left out of the encoded object.
+"""
+from datetime import datetime
+
+import msgspec
+from msgspec import Struct, UNSET, UnsetType
+
+from flaskr.struct import VoteDirection
+
+class UserDetailOut(Struct, kw_only=True):
+    # Unset when the user has no detail row, which encodes as {}
+    f_name: str|None|UnsetType = UNSET
+    l_name: str|None|UnsetType = UNSET
+    bio: str|None|UnsetType = UNSET
+
+    @classmethod
+    def from_model(cls, detail) -> 'UserDetailOut':
+        if detail is None:
+            return cls()
+        return cls(f_name=detail.f_name, l_name=detail.l_name, bio=detail.bio)
+
+
+class UserOut(Struct, kw_only=True):
+    user_id: int
+    username: str
+    created_at: datetime|None
+    updated_at: datetime|None
+    details: UserDetailOut
+
+    @classmethod
+    def from_model(cls, user) -> 'UserOut':
+        return cls(
+            user_id=user.user_id,
+            username=user.username,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+            details=UserDetailOut.from_model(user.user_detail)
+        )
+
+
+class UserRefOut(Struct, kw_only=True):
+    user_id: int
+    username: str
+
+
+class UserSearchOut(Struct, kw_only=True):
+    items: list[UserRefOut]
+
+
+class PaginationOut(Struct, kw_only=True):
+    per_page: int
+    has_prev: bool
+    has_next: bool
+    prev_cursor: str|None = None
+    next_cursor: str|None = None
+    # Offset pagination only
+    page: int|UnsetType = UNSET
+    offset: int|UnsetType = UNSET
+    prev_page: int|None|UnsetType = UNSET
+    next_page: int|None|UnsetType = UNSET
+    # Only when totals are requested; `approximate` marks maintained counters
+    total: int|UnsetType = UNSET
+    total_pages: int|UnsetType = UNSET
+    approximate: bool|UnsetType = UNSET
+
+
+class CommentOut(Struct, kw_only=True):
+    comment_id: int
+    temp_id: str|None
+    post_id: int
+    user_id: int
+    content: str
+    up_votes: int
+    down_votes: int
+    total_votes: int
+    created_at: datetime|None
+    updated_at: datetime|None
+    author: UserOut
+    # Unset in cached fragments, where it is spliced in per request
+    user_vote: VoteDirection|None|UnsetType = UNSET
+
+    @classmethod
+    def from_model(cls, comment, user_vote=UNSET) -> 'CommentOut':
+        return cls(
+            comment_id=comment.comment_id,
+            temp_id=comment.temp_id,
+            post_id=comment.post_id,
+            user_id=comment.user_id,
+            content=comment.content,
+            up_votes=comment.upvotes_cnt,
+            down_votes=comment.dnvotes_cnt,
+            total_votes=comment.score,
+            created_at=comment.created_at,
+            updated_at=comment.updated_at,
+            author=UserOut.from_model(comment.user),
+            user_vote=user_vote
+        )
+
+
+class CommentPageOut(Struct, kw_only=True):
+    items: list[CommentOut]
+    pagination: PaginationOut
+
+
+class PostOut(Struct, kw_only=True):
+    post_id: int
+    temp_id: str|None
+    user_id: int
+    title: str
+    content: str|None
+    up_votes: int
+    down_votes: int
+    total_votes: int
+    comment_count: int
+    created_at: datetime|None
+    updated_at: datetime|None
+    author: UserOut
+    user_vote: VoteDirection|None|UnsetType = UNSET
+    # A full list in feeds, one page of comments on the post detail route
+    comments: list[CommentOut]|CommentPageOut|UnsetType = UNSET
+
+    @classmethod
+    def from_model(cls, post, user_vote=UNSET, comments=UNSET) -> 'PostOut':
+        return cls(
+            post_id=post.post_id,
+            temp_id=post.temp_id,
+            user_id=post.user_id,
+            title=post.title,
+            content=post.content,
+            up_votes=post.upvotes_cnt,
+            down_votes=post.dnvotes_cnt,
+            total_votes=post.score,
+            comment_count=post.comment_cnt,
+            created_at=post.created_at,
+            updated_at=post.updated_at,
+            author=UserOut.from_model(post.user),
+            user_vote=user_vote,
+            comments=comments
+        )
+
+
+class PostPageOut(Struct, kw_only=True):
+    items: list[PostOut]
+    pagination: PaginationOut
+    # Logged-in callers only
+    user_id: int|UnsetType = UNSET
+    user_votes: dict[str, dict[int, VoteDirection]]|UnsetType = UNSET
+
+
+class VoteCountsOut(Struct, kw_only=True):
+    post_id: int|UnsetType = UNSET
+    comment_id: int|UnsetType = UNSET
+    up_votes: int
+    down_votes: int
+    total_votes: int
+    user_vote: VoteDirection|None|UnsetType = UNSET
+
+
+class BulkVotesOut(Struct, kw_only=True):
+    posts: list[VoteCountsOut]
+    comments: list[VoteCountsOut]
+    # Ids that no longer exist, by kind ('posts', 'comments'); their votes were skipped
+    missing: dict[str, list[int]]
+
+
+class UserVotesOut(Struct, kw_only=True):
+    user_id: int
+    user_votes: dict[str, dict[int, VoteDirection]]
+
+
+class SearchHitOut(Struct, kw_only=True):
+    type: str
+    # Backend relevance; only comparable within one result set
+    score: float
+    post: PostOut|UnsetType = UNSET
+    comment: CommentOut|UnsetType = UNSET
+
+
+class SearchPageOut(Struct, kw_only=True):
+    items: list[SearchHitOut]
+    pagination: PaginationOut
+
+
+RESPONSE_STRUCTS = (
+    UserOut, PostOut, CommentOut, PostPageOut, CommentPageOut, PaginationOut,
+    VoteCountsOut, BulkVotesOut, UserVotesOut, SearchPageOut, UserSearchOut
+)
+
+def definitions() -> dict[str, dict]:
+    """JSON Schema of every response struct, keyed by struct name, for Swagger `definitions`."""
+    _, components = msgspec.json.schema_components(
+        RESPONSE_STRUCTS, ref_template='#/definitions/{name}'
+    )
+    return components
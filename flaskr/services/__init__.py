@@ -1,25 +1,45 @@
 from flask import Response, jsonify
 from flask_jwt_extended.exceptions import JWTExtendedException
 
-from .auth_service import user_id_credentials
+from .auth_service import user_id_credentials, revoke_token
+from .token_blocklist import token_blocklist
 from .chat_service import get_current_chat, add_message
-from .social_media_service import get_all_posts, get_comments_of_post_auth, delete_comment, \
-    delete_post, update_comment, update_post, create_comment, create_post, \
+from .social_media_service import get_all_posts, render_all_posts, get_comments_of_post_auth, \
+    get_comments_of_posts_auth, get_comments_page_of_post, get_post_detail, get_user_votes, \
+    delete_comment, delete_post, update_comment, update_post, create_comment, create_post, \
     inc_post_upvotes, dec_post_upvotes, inc_post_dnvotes, dec_post_dnvotes, \
-    handle_comment_vote, handle_post_vote, get_all_posts_auth
+    handle_comment_vote, handle_post_vote, handle_bulk_votes, get_all_posts_auth, \
+    recompute_vote_scores, feed_version, page_comment_ids, post_version, \
+    iter_comments_of_post
+from .ranking import refresh_ranks, start_rank_refresher
+from .counter_service import get_counter, refresh_counters
+from .vote_buffer import vote_buffer, reconcile_vote_counts
+from .vote_cache import user_vote_cache
+from .fragments import fragment_cache
+from .search_service import search, rebuild_search_index
 from .registration_service import add_user
-from .user_service import get_user_info_by_id
+from .user_service import get_user_info_by_id, user_version, iter_users, search_usernames
+from .username_index import username_index
+from .identity import UserIdentity, ClaimsIdentity, identity_from_claims, user_identity_cache
 
 __all__ = [
-    'user_id_credentials',
+    'user_id_credentials', 'revoke_token', 'token_blocklist',
     'get_current_chat', 'add_message',
-    'get_all_posts', 'get_comments_of_post_auth', 'delete_comment', 'delete_post', 
+    'get_all_posts', 'render_all_posts', 'get_comments_of_post_auth', 'get_comments_of_posts_auth', 
+    'get_comments_page_of_post', 'get_post_detail', 'get_user_votes',
+    'delete_comment', 'delete_post', 
     'update_comment', 'update_post', 'create_comment', 'create_post', 
     'inc_post_upvotes', 'dec_post_upvotes', 'inc_post_dnvotes', 
-    'dec_post_dnvotes', 'handle_comment_vote', 'handle_post_vote', 
-    'get_all_posts_auth',
+    'dec_post_dnvotes', 'handle_comment_vote', 'handle_post_vote', 'handle_bulk_votes',
+    'get_all_posts_auth', 'recompute_vote_scores', 'feed_version', 'page_comment_ids', 'post_version',
+    'iter_comments_of_post',
+    'refresh_ranks', 'start_rank_refresher',
+    'get_counter', 'refresh_counters',
+    'vote_buffer', 'reconcile_vote_counts', 'user_vote_cache', 'fragment_cache',
+    'search', 'rebuild_search_index',
     'add_user',
-    'get_user_info_by_id',
+    'get_user_info_by_id', 'user_version', 'iter_users', 'search_usernames', 'username_index',
+    'UserIdentity', 'ClaimsIdentity', 'identity_from_claims', 'user_identity_cache',
 ]
 
 # AUTHORIZATION EXCEPTION RESPONSES
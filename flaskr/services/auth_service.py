@@ -5,6 +5,7 @@ from flask import current_app, jsonify
 from flask_jwt_extended import create_access_token
 from flaskr.models import User
 from flaskr.extensions import db
+from .token_blocklist import token_blocklist
 
 def user_id_credentials(username, password):
     user: User = User.authenticate(username=username, password=password)
@@ -30,4 +31,8 @@ def user_id_credentials(username, password):
         }
         print(token)
         return payload
-    return None
\ No newline at end of file
+    return None
+
+def revoke_token(jwt_data: dict):
+    """Revoke the token these (verified) claims belong to until it expires."""
+    token_blocklist.revoke(jwt_data['jti'], jwt_data.get('exp'))
\ No newline at end of file
@@ -0,0 +1,54 @@
+from sqlalchemy import select, update, func
+from flaskr.models import Post, Comment, RowCounter
+from flaskr.extensions import db
+
+POST_COUNTER = 'post'
+
+def bump_counter(name: str, delta: int):
+    """Adjust a counter inside the caller's transaction; commit is left to the caller."""
+    db.session.execute(
+        update(RowCounter)
+        .where(RowCounter.name == name)
+        .values(value=RowCounter.value + delta)
+    )
+
+def _count_rows(name: str) -> int:
+    if name == POST_COUNTER:
+        return db.session.scalar(select(func.count(Post.post_id)))
+    raise ValueError(f"Unknown counter: {name!r}")
+
+def get_counter(name: str) -> tuple[int, bool]:
+    """Return (count, approximate).
+
+    Served from the counter table when it has been seeded (`flask refresh-counts`,
+    run at deploy); otherwise the rows are counted and the exact count returned.
+    Reads never write, so they are safe on a replica and don't change what
+    conditional GETs see between two requests.
+    """
+    value = db.session.scalar(select(RowCounter.value).where(RowCounter.name == name))
+    if value is not None:
+        return max(value, 0), True
+    return _count_rows(name), False
+
+def refresh_counters() -> dict[str, int]:
+    """Re-sync every counter with the real row counts (run periodically to correct drift)."""
+    totals = { POST_COUNTER: _count_rows(POST_COUNTER) }
+    for name, value in totals.items():
+        counter = db.session.get(RowCounter, name)
+        if counter:
+            counter.value = value
+        else:
+            db.session.add(RowCounter(name=name, value=value))
+
+    comment_cnt = (
+        select(func.count(Comment.comment_id))
+        .where(Comment.post_id == Post.post_id)
+        .scalar_subquery()
+    )
+    totals['post.comment_cnt'] = db.session.execute(
+        update(Post)
+        .where(Post.comment_cnt != comment_cnt)
+        .values(comment_cnt=comment_cnt, version=Post.version + 1)
+    ).rowcount
+    db.session.commit()
+    return totals
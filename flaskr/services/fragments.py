@@ -0,0 +1,86 @@
+"""\
+    Cached, pre-serialized JSON fragments for posts and comments
+
+    Each fragment is one row's encoded PostOut/CommentOut struct, keyed by
+    id, the row's `version` (bumped by every write to it), its rendered
+    `updated_at` and the author fields it embeds. Any change produces a new
+    key, so outdated fragments are never served; they simply age out of the
+    LRU. Per-request fields (`user_vote`, nested `comments`) are spliced
+    onto the bytes.
+"""
+from flask import current_app
+
+from flaskr.cache import LocalLRUBackend
+from flaskr.models import Post, Comment
+from flaskr.schemas import PostOut, CommentOut
+
+class FragmentCache:
+    def __init__(self):
+        self.backend = None
+
+    def init_app(self, app):
+        config = app.config
+        config.setdefault('FRAGMENT_CACHE_ENABLED', True)
+        config.setdefault('FRAGMENT_CACHE_MAX_ENTRIES', 50000)
+        config.setdefault('FRAGMENT_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+        config.setdefault('FRAGMENT_CACHE_TTL', 3600)
+        self.backend = LocalLRUBackend(
+            max_entries=config['FRAGMENT_CACHE_MAX_ENTRIES'],
+            max_bytes=config['FRAGMENT_CACHE_MAX_BYTES'],
+            default_timeout=config['FRAGMENT_CACHE_TTL']
+        ) if config['FRAGMENT_CACHE_ENABLED'] else None
+        app.extensions['fragment_cache'] = self
+
+    def get_or_render(self, key: str, render) -> bytes:
+        if self.backend is None:
+            return render()
+        fragment = self.backend.get(key)
+        if fragment is None:
+            fragment = render()
+            self.backend.set(key, fragment)
+        return fragment
+
+fragment_cache = FragmentCache()
+
+def _encode(obj) -> bytes:
+    return current_app.json.dumps_bytes(obj)
+
+def _author_version(row) -> int:
+    """Hash of the author fields a fragment embeds (UserOut), detail row included."""
+    user = row.user
+    if user is None:
+        return 0
+    detail = user.user_detail
+    return hash((
+        user.user_id, user.username, user.created_at, user.updated_at,
+        detail and (detail.f_name, detail.l_name, detail.bio)
+    ))
+
+def post_fragment(post: Post) -> bytes:
+    # `updated_at` is rendered too, and rank refreshes move it without a new version
+    key = f'post:{post.post_id}:{post.version}:{post.updated_at}:{_author_version(post)}'
+    def render():
+        # `user_vote` and `comments` are left unset and spliced on per request
+        return _encode(PostOut.from_model(post))
+    return fragment_cache.get_or_render(key, render)
+
+def comment_fragment(comment: Comment) -> bytes:
+    key = f'comment:{comment.comment_id}:{comment.version}:{comment.updated_at}:{_author_version(comment)}'
+    def render():
+        return _encode(CommentOut.from_model(comment))
+    return fragment_cache.get_or_render(key, render)
+
+def splice(fragment: bytes, fields: bytes) -> bytes:
+    """Append pre-encoded `"key":value` pairs to an encoded JSON object."""
+    return fragment[:-1] + b',' + fields + b'}'
+
+def render_posts(posts: list[Post]) -> bytes:
+    """Encoded feed items for anonymous/shared pages (`user_vote` is null)."""
+    items = []
+    for post in posts:
+        comments = b','.join(
+            splice(comment_fragment(comment), b'"user_vote":null')
+            for comment in post.comments
+        )
+        items.append(splice(post_fragment(post), b'"user_vote":null,"comments":[' + comments + b']'))
+    return b'[' + b','.join(items) + b']'
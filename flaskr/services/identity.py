@@ -0,0 +1,122 @@
+"""\
+    Request identities for the JWT `user_lookup_loader`
+
+    `lookup` mode (USER_IDENTITY_MODE, the default) reads id, username and
+    account type through a TTL cache, so deleted users and changed account
+    types take effect within USER_CACHE_TTL. Opt-in `claims` mode builds the
+    identity from the verified token's `sub`/`acct_type` claims with no SQL,
+    trusting them until the token expires.
+"""
+import os
+import threading
+
+from cachetools import TTLCache
+from sqlalchemy import select, event
+
+from flaskr.models import User
+from flaskr.extensions import db
+from flaskr.struct import AccountType
+
+class UserIdentity:
+    """Detached stand-in for `User` carrying only what request handlers read."""
+    __slots__ = ('user_id', 'username', 'account_type')
+
+    def __init__(self, user_id: int, username: str, account_type: AccountType):
+        self.user_id = user_id
+        self.username = username
+        self.account_type = account_type
+
+    def __repr__(self):
+        return f'<UserIdentity {self.user_id} {self.username!r}>'
+
+
+class ClaimsIdentity:
+    """Identity taken from verified JWT claims.
+
+    `user_id` and `account_type` come straight from the token; reading any
+    other attribute loads the full `User` once and delegates to it.
+    """
+    __slots__ = ('user_id', 'account_type', '_user')
+
+    def __init__(self, user_id: int, account_type: AccountType):
+        self.user_id = user_id
+        self.account_type = account_type
+        self._user = None
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        if self._user is None:
+            self._user = db.session.get(User, self.user_id)
+            if self._user is None:
+                raise AttributeError(f"User {self.user_id} no longer exists")
+        return getattr(self._user, name)
+
+    def __repr__(self):
+        return f'<ClaimsIdentity {self.user_id} {self.account_type.name}>'
+
+def identity_from_claims(jwt_data: dict) -> ClaimsIdentity|None:
+    """A ClaimsIdentity for the token, or None if it lacks the claims (e.g. older tokens)."""
+    try:
+        return ClaimsIdentity(int(jwt_data['sub']), AccountType[jwt_data['acct_type']])
+    except (KeyError, ValueError):
+        return None
+
+
+class UserIdentityCache:
+    """Bounded TTL cache of user_id -> UserIdentity.
+
+    Entries are dropped as soon as this process updates or deletes the user;
+    changes made by other workers are picked up when the entry expires.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache = None
+
+    def init_app(self, app):
+        config = app.config
+        config.setdefault('USER_IDENTITY_MODE', os.getenv('USER_IDENTITY_MODE', 'lookup'))
+        config.setdefault('USER_CACHE_ENABLED', True)
+        config.setdefault('USER_CACHE_MAX_ENTRIES', 10000)
+        config.setdefault('USER_CACHE_TTL', 60)
+        self._cache = TTLCache(
+            maxsize=config['USER_CACHE_MAX_ENTRIES'], ttl=config['USER_CACHE_TTL']
+        ) if config['USER_CACHE_ENABLED'] else None
+        app.extensions['user_identity_cache'] = self
+
+    def _fetch(self, user_id: int) -> UserIdentity|None:
+        row = db.session.execute(
+            select(User.user_id, User.username, User.account_type).where(User.user_id == user_id)
+        ).one_or_none()
+        return UserIdentity(*row) if row else None
+
+    def load(self, user_id: int) -> UserIdentity|None:
+        if self._cache is None:
+            return self._fetch(user_id)
+        with self._lock:
+            identity = self._cache.get(user_id)
+        if identity is None:
+            identity = self._fetch(user_id)
+            # Unknown ids aren't cached; the JWT loader rejects them anyway
+            if identity is not None:
+                with self._lock:
+                    self._cache[user_id] = identity
+        return identity
+
+    def invalidate(self, user_id: int):
+        if self._cache is not None:
+            with self._lock:
+                self._cache.pop(user_id, None)
+
+    def clear(self):
+        if self._cache is not None:
+            with self._lock:
+                self._cache.clear()
+
+user_identity_cache = UserIdentityCache()
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_user(mapper, connection, target):
+    user_identity_cache.invalidate(target.user_id)
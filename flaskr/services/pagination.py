@@ -0,0 +1,109 @@
+"""\
+    Opaque cursor helpers for keyset (seek) pagination of feed queries
+"""
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+from flaskr.schemas import PaginationOut
+
+CURSOR_DIRECTIONS = ('next', 'prev')
+
+def encode_cursor(sort_by: str, order: str, key, ident: int, direction: str = 'next') -> str:
+    if isinstance(key, datetime):
+        key = {'dt': key.isoformat()}
+    payload = {
+        's': sort_by,
+        'o': order.lower(),
+        'k': key,
+        'id': ident,
+        'd': direction
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor: str, sort_by: str, order: str) -> dict:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        key = payload['k']
+        if isinstance(key, dict):
+            key = datetime.fromisoformat(key['dt'])
+        position = {
+            'key': key,
+            'id': int(payload['id']),
+            'direction': payload['d']
+        }
+        sort_matches = payload['s'] == sort_by and payload['o'] == order.lower()
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if position['direction'] not in CURSOR_DIRECTIONS:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    if not sort_matches:
+        raise ValueError("Cursor does not match sort_by/order")
+    return position
+
+def apply_keyset(stmt, key_col, id_col, order: str, per_page: int, position: dict|None = None):
+    """Seek past `position` on (key_col, id_col) and fetch one extra row to detect more pages."""
+    backwards = bool(position) and position['direction'] == 'prev'
+    # Walking backwards scans the index the other way; keyset_page restores the order
+    descending = (order.lower() == 'desc') != backwards
+
+    if position:
+        key, ident = position['key'], position['id']
+        if descending:
+            seek = or_(key_col < key, and_(key_col == key, id_col < ident))
+        else:
+            seek = or_(key_col > key, and_(key_col == key, id_col > ident))
+        stmt = stmt.where(seek)
+
+    if descending:
+        stmt = stmt.order_by(key_col.desc(), id_col.desc())
+    else:
+        stmt = stmt.order_by(key_col.asc(), id_col.asc())
+    return stmt.limit(per_page + 1)
+
+def keyset_page(rows: list, per_page: int, position: dict|None, make_cursor) -> tuple[list, PaginationOut]:
+    """Trim the look-ahead row and build cursor pagination metadata.
+
+    `make_cursor(row, direction)` must return the encoded cursor for a row.
+    """
+    backwards = bool(position) and position['direction'] == 'prev'
+    has_more = len(rows) > per_page
+    rows = list(rows[:per_page])
+    if backwards:
+        rows.reverse()
+
+    has_next = True if backwards else has_more
+    has_prev = has_more if backwards else bool(position)
+
+    return rows, PaginationOut(
+        per_page=per_page,
+        has_prev=has_prev,
+        has_next=has_next,
+        prev_cursor=make_cursor(rows[0], 'prev') if (has_prev and rows) else None,
+        next_cursor=make_cursor(rows[-1], 'next') if (has_next and rows) else None
+    )
+
+def offset_page(rows: list, page: int, per_page: int, make_cursor) -> tuple[list, PaginationOut]:
+    """Pagination metadata for a LIMIT per_page + 1 OFFSET query.
+
+    The look-ahead row decides `has_next`, so no COUNT is needed. Cursors are
+    handed out too, so clients can switch to keyset mode from any offset page.
+    """
+    has_next = len(rows) > per_page
+    has_prev = page > 1
+    rows = list(rows[:per_page])
+    return rows, PaginationOut(
+        page=page,
+        per_page=per_page,
+        offset=(page - 1) * per_page,
+        has_prev=has_prev,
+        has_next=has_next,
+        prev_page=page - 1 if has_prev else None,
+        next_page=page + 1 if has_next else None,
+        prev_cursor=make_cursor(rows[0], 'prev') if (has_prev and rows) else None,
+        next_cursor=make_cursor(rows[-1], 'next') if (has_next and rows) else None
+    )
@@ -8,6 +8,7 @@ from sqlalchemy.exc import IntegrityError                   # For exception hand
 from sqlalchemy import select
 
 from .forms import UserRegistrationForm, PtRegForm, DrRegForm, PharmRegForm
+from .username_index import username_index
 
 def add_address():
     """
@@ -81,4 +82,5 @@ def add_user(user_info: ImmutableMultiDict) -> Response:
         m = f'unexpected: {e=}, {type(e)=}'
         return make_response(jsonify({'error': m}), 400)
     else:
+        username_index.add(new_user.user_id, new_user.username)
         return make_response(jsonify({'user_id': new_user.user_id}), 201)
\ No newline at end of file
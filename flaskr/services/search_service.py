@@ -0,0 +1,147 @@
+"""\
+    Relevance-ranked full-text search over posts and comments
+
+    MySQL answers from the FULLTEXT indexes on Post/Comment, which InnoDB
+    keeps current on its own. SQLite (tests, local runs) answers from the
+    FTS5 tables in models/search.py, which the write paths in
+    social_media_service keep in sync through the index_*/unindex_* helpers.
+"""
+import re
+
+from sqlalchemy import select, delete, literal, literal_column, union_all, func
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import selectinload
+
+from flaskr.models import Post, Comment, User, post_fts, comment_fts
+from flaskr.extensions import db
+from flaskr.schemas import PostOut, CommentOut, PaginationOut, SearchHitOut, SearchPageOut
+from .pagination import encode_cursor, decode_cursor, apply_keyset, keyset_page
+
+SEARCH_KINDS = ('post', 'comment')
+# Hits of both kinds share one keyset; doc = id * 2 + kind keeps it unique
+_KIND_BIT = {'post': 0, 'comment': 1}
+MAX_QUERY_LENGTH = 256
+
+def _uses_fts5() -> bool:
+    return db.session.get_bind().dialect.name == 'sqlite'
+
+def _fts5_query(q: str) -> str:
+    # Quote every term so user input can't hit FTS5 query syntax; terms are ANDed
+    return ' '.join(f'"{term}"' for term in re.findall(r'\w+', q))
+
+def index_post(post: Post):
+    """Add or refresh a post in the search index; no commit."""
+    if _uses_fts5():
+        db.session.execute(
+            post_fts.insert().prefix_with('OR REPLACE')
+            .values(rowid=post.post_id, title=post.title, content=post.content or '')
+        )
+
+def unindex_post(post_id: int):
+    """Remove a post and its comments from the search index; no commit."""
+    if _uses_fts5():
+        db.session.execute(delete(post_fts).where(post_fts.c.rowid == post_id))
+        db.session.execute(delete(comment_fts).where(comment_fts.c.post_id == post_id))
+
+def index_comment(comment: Comment):
+    if _uses_fts5():
+        db.session.execute(
+            comment_fts.insert().prefix_with('OR REPLACE')
+            .values(rowid=comment.comment_id, content=comment.content, post_id=comment.post_id)
+        )
+
+def unindex_comment(comment_id: int):
+    if _uses_fts5():
+        db.session.execute(delete(comment_fts).where(comment_fts.c.rowid == comment_id))
+
+def rebuild_search_index() -> tuple[int, int]:
+    """Repopulate the FTS5 tables from post/comment (no-op on MySQL)."""
+    if not _uses_fts5():
+        return 0, 0
+    db.session.execute(delete(post_fts))
+    db.session.execute(delete(comment_fts))
+    posts = db.session.execute(
+        post_fts.insert().from_select(
+            ['rowid', 'title', 'content'],
+            select(Post.post_id, Post.title, func.coalesce(Post.content, ''))
+        )
+    ).rowcount
+    comments = db.session.execute(
+        comment_fts.insert().from_select(
+            ['rowid', 'content', 'post_id'],
+            select(Comment.comment_id, Comment.content, Comment.post_id)
+        )
+    ).rowcount
+    db.session.commit()
+    return posts, comments
+
+def _matches(kind: str, q: str):
+    """(kind, ident, score, doc) of every match of one kind; higher score = more relevant."""
+    if _uses_fts5():
+        fts = post_fts if kind == 'post' else comment_fts
+        name = literal_column(fts.name)
+        # bm25() is lower-is-better
+        score, ident = -func.bm25(name), fts.c.rowid
+        stmt = select().select_from(fts).where(name.op('MATCH')(_fts5_query(q)))
+    else:
+        if kind == 'post':
+            against, ident = mysql.match(Post.title, Post.content, against=q), Post.post_id
+        else:
+            against, ident = mysql.match(Comment.content, against=q), Comment.comment_id
+        score = against.in_natural_language_mode()
+        stmt = select().where(score)
+    return stmt.add_columns(
+        literal(kind).label('kind'),
+        ident.label('ident'),
+        score.label('score'),
+        (ident * 2 + _KIND_BIT[kind]).label('doc')
+    )
+
+def _load(model, ids: list[int], *options) -> dict:
+    if not ids:
+        return {}
+    id_col = model.__mapper__.primary_key[0]
+    rows = db.session.scalars(select(model).where(id_col.in_(ids)).options(*options))
+    return { getattr(row, id_col.key): row for row in rows }
+
+def search(q: str, kind: str = 'all', per_page: int = 20, cursor: str|None = None) -> SearchPageOut:
+    q = (q or '').strip()
+    if not q:
+        raise ValueError("q is required")
+    if len(q) > MAX_QUERY_LENGTH:
+        raise ValueError(f"q must be at most {MAX_QUERY_LENGTH} characters")
+    if kind != 'all' and kind not in SEARCH_KINDS:
+        raise ValueError(f"Invalid search type: {kind!r}")
+    if _uses_fts5() and not _fts5_query(q):
+        # Nothing searchable left after stripping punctuation
+        return SearchPageOut(items=[], pagination=PaginationOut(
+            per_page=per_page, has_prev=False, has_next=False
+        ))
+
+    sort_by = f'search:{kind}'
+    position = decode_cursor(cursor, sort_by, 'desc') if cursor else None
+    selects = [_matches(k, q) for k in SEARCH_KINDS if kind in ('all', k)]
+    hits = (selects[0] if len(selects) == 1 else union_all(*selects)).subquery()
+    stmt = apply_keyset(select(hits), hits.c.score, hits.c.doc, 'desc', per_page, position)
+
+    def make_cursor(row, direction):
+        return encode_cursor(sort_by, 'desc', row.score, row.doc, direction)
+    rows, pagination_info = keyset_page(
+        db.session.execute(stmt).all(), per_page, position, make_cursor
+    )
+
+    author = selectinload(Post.user).selectinload(User.user_detail)
+    posts = _load(Post, [r.ident for r in rows if r.kind == 'post'], author)
+    comments = _load(
+        Comment, [r.ident for r in rows if r.kind == 'comment'],
+        selectinload(Comment.user).selectinload(User.user_detail)
+    )
+    items = []
+    for row in rows:
+        if row.kind == 'post' and row.ident in posts:
+            items.append(SearchHitOut(type='post', score=row.score,
+                                      post=PostOut.from_model(posts[row.ident])))
+        elif row.kind == 'comment' and row.ident in comments:
+            items.append(SearchHitOut(type='comment', score=row.score,
+                                      comment=CommentOut.from_model(comments[row.ident])))
+    return SearchPageOut(items=items, pagination=pagination_info)
@@ -1,92 +1,281 @@
 import warnings
-from sqlalchemy import text, select, func, and_, exc as sa_exc
+from sqlalchemy import text, select, update, delete, func, and_, case, literal, union_all, exc as sa_exc
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import selectinload, joinedload
 from flaskr.models import Post, Comment, PostVotes, CommentVotes, User
 from flaskr.extensions import db
+from flaskr.struct import VoteDirection
+from flaskr.schemas import PostOut, CommentOut, PostPageOut, CommentPageOut, PaginationOut, \
+    VoteCountsOut, BulkVotesOut
 from datetime import datetime
+from flask import current_app
+from flaskr.replicas import replica_read
+from .pagination import encode_cursor, decode_cursor, apply_keyset, keyset_page, offset_page
+from .counter_service import POST_COUNTER, bump_counter, get_counter
+from .ranking import hot, confidence
+from .vote_buffer import vote_buffer, apply_vote_deltas, rerank_rows, touch_comment_threads
+from .vote_cache import user_vote_cache
+from .fragments import render_posts
+from .search_service import index_post, unindex_post, index_comment, unindex_comment
+
+# `sort_by` values backed by a maintained column
+SORT_COLUMNS = {'total_votes': 'score', 'hot': 'hot_rank', 'best': 'best_rank'}
+# Numeric rank of the caller's vote so `sort_by=user_vote` can be ordered in SQL
+USER_VOTE_RANK = {VoteDirection.UP: 1, VoteDirection.NONE: 0, VoteDirection.DOWN: -1}
+
+def _vote_rank(vote_direction_col):
+    return case(
+        (vote_direction_col == VoteDirection.UP, 1),
+        (vote_direction_col == VoteDirection.DOWN, -1),
+        else_=0
+    )
+
+def _sort_key(model, sort_by: str, vote_direction_col=None):
+    """Resolve a `sort_by` argument to the SQL expression the query orders on."""
+    if (sort_by == 'user_vote') and (vote_direction_col is not None):
+        return _vote_rank(vote_direction_col)
+    column = SORT_COLUMNS.get(sort_by, sort_by)
+    if not hasattr(model, column):
+        raise ValueError(f"Invalid sort field: {sort_by!r}")
+    return getattr(model, column)
+
+def _feed_load_options(comments: bool = True):
+    """Batch-load everything `to_dict` touches with one `IN (...)` query per relationship.
+
+    Keeps a feed page at a constant number of statements instead of one per
+    post, comment, author and user detail.
+    """
+    options = [selectinload(Post.user).selectinload(User.user_detail)]
+    if comments:
+        options.append(
+            selectinload(Post.comments)
+                .selectinload(Comment.user)
+                .selectinload(User.user_detail)
+        )
+    return options
+
+def _validate_order(order: str) -> str:
+    if order.lower() not in ('asc', 'desc'):
+        raise ValueError(f"Invalid order: {order}")
+    return order.lower()
+
+def _order_by(key_col, id_col, order: str):
+    if order == 'desc':
+        return key_col.desc(), id_col.desc()
+    return key_col.asc(), id_col.asc()
+
+def _cursor_factory(sort_by: str, order: str, id_attr: str, auth: bool = False):
+    def make_cursor(row, direction):
+        obj, user_vote = row if auth else (row, None)
+        if sort_by == 'user_vote':
+            key = USER_VOTE_RANK[user_vote] if user_vote else 0
+        else:
+            key = getattr(obj, SORT_COLUMNS.get(sort_by, sort_by))
+        return encode_cursor(sort_by, order, key, getattr(obj, id_attr), direction)
+    return make_cursor
+
+def _comment_out(cmt: Comment, user_vote: VoteDirection|None) -> CommentOut:
+    return CommentOut.from_model(cmt, user_vote=user_vote)
+
+def _comment_select(user_id: int|None, stream: bool = False):
+    # Both author relationships are many-to-one, so a join is safe with yield_per;
+    # selectinload's batched IN queries are not
+    loader = joinedload if stream else selectinload
+    return (
+        select(Comment, CommentVotes.vote_direction)
+        .join_from(
+            Comment, CommentVotes,
+            onclause=and_(
+                CommentVotes.comment_id == Comment.comment_id,
+                CommentVotes.user_id == user_id
+            ), isouter=True
+        )
+        .options(loader(Comment.user).options(loader(User.user_detail)))
+    )
+
+def _add_post_totals(pagination_info: PaginationOut, per_page: int):
+    total, approximate = get_counter(POST_COUNTER)
+    pagination_info.total = total
+    pagination_info.total_pages = (total + per_page - 1) // per_page  # Ceiling division
+    pagination_info.approximate = approximate
+
+def _with_post_votes(stmt, user_id: int):
+    """Outer-join `user_id`'s vote on each post."""
+    return stmt.join_from(
+        Post,
+        PostVotes,
+        onclause=and_(
+            PostVotes.post_id == Post.post_id,
+            PostVotes.user_id == user_id
+        ),
+        isouter=True
+    )
+
+def _page_stmt(stmt, key_col, sort_by: str, order: str, page: int, per_page: int, cursor: str|None):
+    """Order and limit a post query to one feed page; returns (stmt, keyset position)."""
+    if cursor is not None:
+        # Keyset mode: seek on (sort column, post_id) instead of skipping rows
+        position = decode_cursor(cursor, sort_by, order) if cursor else None
+        return apply_keyset(stmt, key_col, Post.post_id, order, per_page, position), position
+    stmt = stmt.order_by(*_order_by(key_col, Post.post_id, order))
+    return stmt.offset((page - 1) * per_page).limit(per_page + 1), None
+
+def _query_all_posts(
+    sort_by: str, 
+    order: str, 
+    page: int,
+    per_page: int,
+    include_total: bool,
+    cursor: str|None
+) -> tuple[list[Post], PaginationOut]:
+    order = _validate_order(order)
+    key_col = _sort_key(Post, sort_by)
+    make_cursor = _cursor_factory(sort_by, order, 'post_id')
+
+    stmt, position = _page_stmt(
+        select(Post).options(*_feed_load_options()),
+        key_col, sort_by, order, page, per_page, cursor
+    )
+    rows = db.session.scalars(stmt).all()
+    if cursor is not None:
+        posts, pagination_info = keyset_page(rows, per_page, position, make_cursor)
+    else:
+        posts, pagination_info = offset_page(rows, page, per_page, make_cursor)
+        if include_total:
+            _add_post_totals(pagination_info, per_page)
+    return posts, pagination_info
+
+def _viewer_votes(user_id: int|None, post_ids: list[int]) -> tuple:
+    """`user_id`'s votes on the posts and their comments.
+
+    With write-behind votes the vote row is committed before the counter
+    update bumps the row's version, so the viewer's own votes are versioned
+    separately.
+    """
+    if (user_id is None) or not post_ids:
+        return ()
+    post_votes = db.session.execute(
+        select(PostVotes.post_id, PostVotes.vote_direction)
+        .where(PostVotes.user_id == user_id, PostVotes.post_id.in_(post_ids))
+        .order_by(PostVotes.post_id)
+    ).all()
+    comment_votes = db.session.execute(
+        select(CommentVotes.comment_id, CommentVotes.vote_direction)
+        .join(Comment, Comment.comment_id == CommentVotes.comment_id)
+        .where(CommentVotes.user_id == user_id, Comment.post_id.in_(post_ids))
+        .order_by(CommentVotes.comment_id)
+    ).all()
+    return tuple(map(tuple, post_votes)), tuple(map(tuple, comment_votes))
+
+@replica_read
+def feed_version(
+    sort_by: str = 'created_at',
+    order: str = 'asc',
+    page: int = 1,
+    per_page: int = 20,
+    cursor: str|None = None,
+    user_id: int|None = None
+) -> tuple[tuple, list[int]]:
+    """Version data for one feed page: (parts, post_ids).
+
+    Parts are the page's (post_id, version, comments_version) rows, whether a
+    next page exists and the post total, so they change with any write that
+    changes the page, reordering included. They leave out the viewer's own
+    votes (see get_user_votes). `user_id` is only needed to order by
+    `user_vote`. Takes the same arguments as get_all_posts/get_all_posts_auth.
+    """
+    order = _validate_order(order)
+    vote_col = PostVotes.vote_direction if user_id is not None else None
+    key_col = _sort_key(Post, sort_by, vote_col)
+
+    stmt = select(Post.post_id, Post.version, Post.comments_version)
+    if (user_id is not None) and (sort_by == 'user_vote'):
+        stmt = _with_post_votes(stmt, user_id)
+    stmt, _ = _page_stmt(stmt, key_col, sort_by, order, page, per_page, cursor)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=sa_exc.SAWarning)
+        rows = tuple(map(tuple, db.session.execute(stmt).all()))
+    # Only whether a look-ahead row exists is on this page, not which post it is
+    rows, has_more = rows[:per_page], len(rows) > per_page
+
+    # Totals are only reported in offset mode
+    total = get_counter(POST_COUNTER)[0] if cursor is None else None
+    return (rows, has_more, total), [row[0] for row in rows]
+
+@replica_read
+def page_comment_ids(post_ids: list[int]) -> list[int]:
+    """Ids of the posts' comments, for pages that aren't in the shared feed cache."""
+    if not post_ids:
+        return []
+    return list(db.session.scalars(
+        select(Comment.comment_id).where(Comment.post_id.in_(post_ids)).order_by(Comment.comment_id)
+    ))
+
+@replica_read
+def post_version(post_id: int, user_id: int|None = None) -> tuple[tuple, tuple, datetime|None]|None:
+    """Version data for a post and its comments: (parts, viewer parts, last_modified).
+
+    None if the post doesn't exist.
+    """
+    row = db.session.execute(
+        select(Post.version, Post.comments_version, Post.updated_at).where(Post.post_id == post_id)
+    ).one_or_none()
+    if row is None:
+        return None
+    comment_updated = db.session.scalar(
+        select(func.max(Comment.updated_at)).where(Comment.post_id == post_id)
+    )
+    last_modified = max(filter(None, (row.updated_at, comment_updated)), default=None)
+    parts = (post_id, row.version, row.comments_version)
+    return parts, _viewer_votes(user_id, [post_id]), last_modified
 
+@replica_read
 def get_all_posts(
     sort_by: str = 'created_at', 
     order: str = 'asc', 
     page: int = 1,
     per_page: int = 20,
     include_total: bool = True,
+    cursor: str|None = None,
     **kwargs
-) -> dict[str]:
-    if ((not hasattr(Post, sort_by)) and (sort_by != 'total_votes')):
-        raise ValueError(f"Invalid sort field: {sort_by!r}")
-
-    # Calculate offset
-    offset = (page - 1) * per_page
-
-    sort_votes = sort_by == 'total_votes'
-
-    if not sort_votes:
-        column = getattr(Post, sort_by)
-
-    if not sort_votes and (order.lower() == 'desc'):
-        column = column.desc()
-    elif not sort_votes and (order.lower() == 'asc'):
-        column = column.asc()
-    elif ((not sort_votes or sort_votes)
-        and (order.lower() != 'desc') 
-        and (order.lower() != 'asc')):
-        raise ValueError(f"Invalid order: {order}")
-
-    stmt = select(Post)
-    if not sort_votes:
-        stmt = stmt.order_by(column)
-
-    posts = db.paginate(stmt, error_out=False)
-
-    ls = []
-    for post in posts:
-        d = post.to_dict()
-        d.update({'total_votes': post.upvotes_cnt - post.dnvotes_cnt, 'user_vote': None})
-        if len(post.comments) > 0:
-            cmts = []
-            for comment in post.comments:
-                if comment.post_id == post.post_id:
-                    cmt = comment.to_dict()
-                    cmt.update({
-                        'total_votes': comment.upvotes_cnt - comment.dnvotes_cnt,
-                        'user_vote': None
-                    })
-                    cmts.append(cmt)
-            d['comments'] = cmts
-        else:
-            #d['comments'] = { 'items': [] }
-            d['comments'] = []
-        ls.append(d)
-
-    rtn = {
-        'pagination': {
-            'page': posts.page,
-            'per_page': posts.per_page,
-            'offset': offset,
-            'has_prev': posts.has_prev,
-            'has_next': posts.has_next,
-            'prev_page': posts.prev_num,
-            'next_page': posts.next_num
-        }
-    }
-
-    # Add total-dependent fields if total was calculated
-    if include_total:
-        rtn['pagination'].update({
-            'total': posts.total,
-            'total_pages': posts.pages,
-        })
-
-    if sort_votes:
-        ls = sorted(
-            ls, 
-            key=lambda it: it['total_votes'], 
-            reverse=(order == 'desc')
-        )
-
-    rtn['items'] = ls
-    return rtn
+) -> PostPageOut:
+    posts, pagination_info = _query_all_posts(
+        sort_by, order, page, per_page, include_total, cursor
+    )
+    items = [
+        PostOut.from_model(post, user_vote=None, comments=[
+            _comment_out(comment, None) for comment in post.comments
+        ])
+        for post in posts
+    ]
+    return PostPageOut(items=items, pagination=pagination_info)
+
+@replica_read
+def render_all_posts(
+    sort_by: str = 'created_at', 
+    order: str = 'asc', 
+    page: int = 1,
+    per_page: int = 20,
+    include_total: bool = True,
+    cursor: str|None = None
+) -> tuple[bytes, list[int], list[int]]:
+    """get_all_posts, encoded straight to JSON bytes from cached per-row fragments.
+
+    Returns (body, post_ids, comment_ids); only rows that changed since they
+    were last rendered pay the serialization cost.
+    """
+    posts, pagination_info = _query_all_posts(
+        sort_by, order, page, per_page, include_total, cursor
+    )
+    body = (
+        b'{"items":' + render_posts(posts)
+        + b',"pagination":' + current_app.json.dumps_bytes(pagination_info) + b'}'
+    )
+    post_ids = [post.post_id for post in posts]
+    comment_ids = [comment.comment_id for post in posts for comment in post.comments]
+    return body, post_ids, comment_ids
 
+@replica_read
 def get_all_posts_auth(
     user_id: int, 
     sort_by: str = 'created_at', 
@@ -94,175 +283,230 @@ def get_all_posts_auth(
     page: int = 1,
     per_page: int = 20,
     include_total: bool = True,
+    cursor: str|None = None,
     **kwargs
-) -> dict[str]:
-    if ((not hasattr(Post, sort_by)) 
-        and (sort_by != 'total_votes')
-        and (sort_by != 'user_vote')):
-        raise ValueError(f"Invalid sort field: {sort_by!r}")
-
-    _s = ((sort_by != 'total_votes') and (sort_by != 'user_vote'))
-
-    if _s:
-        column = getattr(Post, sort_by)
-    if _s and (order.lower() == 'desc'):
-        column = column.desc()
-    elif _s and (order.lower() == 'asc'):
-        column = column.asc()
-    elif ((_s or not _s)
-        and (order.lower() != 'desc') 
-        and (order.lower() != 'asc')):
-        raise ValueError(f"Invalid order: {order}")
-    
-    # Calculate offset
-    offset = (page - 1) * per_page
+) -> PostPageOut:
+    order = _validate_order(order)
+    key_col = _sort_key(Post, sort_by, PostVotes.vote_direction)
+    make_cursor = _cursor_factory(sort_by, order, 'post_id', auth=True)
 
     with warnings.catch_warnings():
         warnings.simplefilter('ignore', category=sa_exc.SAWarning)
-        stmt = (
-            select(Post, PostVotes.vote_direction)
-            .join_from(
-                Post,
-                PostVotes,
-                onclause=and_(
-                    PostVotes.post_id == Post.post_id,
-                    PostVotes.user_id == user_id
-                ),
-                isouter=True
-            )
+        # Comments come from get_comments_of_posts_auth along with the caller's votes
+        stmt, position = _page_stmt(
+            _with_post_votes(select(Post, PostVotes.vote_direction), user_id)
+                .options(*_feed_load_options(comments=False)),
+            key_col, sort_by, order, page, per_page, cursor
         )
+        rows = db.session.execute(stmt).all()
+    if cursor is not None:
+        items, pagination_info = keyset_page(rows, per_page, position, make_cursor)
+    else:
+        items, pagination_info = offset_page(rows, page, per_page, make_cursor)
+        if include_total:
+            _add_post_totals(pagination_info, per_page)
 
-        if _s:
-            stmt = stmt.order_by(column)
-
-        stmt = stmt.offset(offset).limit(per_page)
-        
-        res = db.session.execute(stmt)
-        items = res.all()
+    comments = get_comments_of_posts_auth(user_id, [row[0].post_id for row in items])
 
-        # Get total count if requested
-        total = None
-        total_pages = None
-        if include_total:
-            # Count query - only count posts (not the joined votes)
-            count_stmt = select(func.count(Post.post_id)).outerjoin(
-                PostVotes,
-                and_(
-                    PostVotes.post_id == Post.post_id,
-                    PostVotes.user_id == user_id
-                )
-            )
-            total_result = db.session.execute(count_stmt)
-            total = total_result.scalar()
-            total_pages = (total + per_page - 1) // per_page  # Ceiling division
-
-    # Build pagination metadata
-    pagination_info = {
-        'page': page,
-        'per_page': per_page,
-        'offset': offset,
-        'has_prev': page > 1,
-        'has_next': len(items) == per_page,  # Approximate, accurate if include_total=True
-        'prev_page': page - 1 if page > 1 else None,
-        'next_page': page + 1 if len(items) == per_page else None,
-    }
-    
-    # Add total-dependent fields if total was calculated
-    if include_total:
-        pagination_info.update({
-            'total': total,
-            'total_pages': total_pages,
-            'has_next': page < total_pages,
-            'next_page': page + 1 if page < total_pages else None,
-        })
-        
-    rtn = []
-    for row in items:
-        post, user_vote = row
-        d = post.to_dict()
-        if len(post.comments) > 0:
-            cmts = get_comments_of_post_auth(user_id, post.post_id)
-            d['comments'] = cmts
-        else:
-            #d['comments'] = { 'items': [] }
-            d['comments'] = []
-
-        d['total_votes'] = post.upvotes_cnt - post.dnvotes_cnt
-        d['user_vote'] = user_vote.value if user_vote else None
-        rtn.append(d)
-
-    if sort_by in {'total_votes', 'user_vote'}:
-        rtn = sorted(
-            rtn, 
-            key=lambda it: it[sort_by], 
-            reverse=(order == 'desc')
-        )
-    return {
-        'items': rtn,
-        'pagination': pagination_info
-    }
+    rtn = [
+        PostOut.from_model(post, user_vote=user_vote, comments=comments[post.post_id])
+        for post, user_vote in items
+    ]
+    return PostPageOut(items=rtn, pagination=pagination_info)
 
+@replica_read
 def get_comments_of_post_auth(
     user_id: int, 
     post_id: int, 
     sort_by: str = 'created_at', 
     order: str = 'asc'
 ):
-    post = Post.query.get(post_id)
+    post = db.session.get(Post, post_id)
     if not post:
         raise ValueError("Post not found")
 
-    if (not hasattr(Comment, sort_by) 
-        and (sort_by != 'total_votes')
-        and (sort_by != 'user_vote')):
-        raise ValueError(f"Invalid sort field: {sort_by!r}")
-    _s = ((sort_by != 'total_votes') and (sort_by != 'user_vote'))
-    if _s:
-        column = getattr(Comment, sort_by)
-    if _s and (order.lower() == 'desc'):
-        column = column.desc()
-    elif _s and (order.lower() == 'asc'):
-        column = column.asc()
-    elif ((not _s or _s) 
-          and (order.lower() != 'desc')
-          and (order.lower() != 'asc')):
-        raise ValueError(f"Invalid order: {order}")
+    return get_comments_of_posts_auth(user_id, [post_id], sort_by, order)[post_id]
+
+def get_comments_of_posts_auth(
+    user_id: int|None, 
+    post_ids: list[int], 
+    sort_by: str = 'created_at', 
+    order: str = 'asc'
+) -> dict[int, list[CommentOut]]:
+    """Load the comments of several posts, with the caller's vote, in one query.
+
+    Returns {post_id: [CommentOut, ...]} with an entry for every requested id.
+    """
+    order = _validate_order(order)
+    key_col = _sort_key(Comment, sort_by, CommentVotes.vote_direction)
+
+    rtn = { post_id: [] for post_id in post_ids }
+    if not rtn:
+        return rtn
 
     with warnings.catch_warnings():
         warnings.simplefilter('ignore', category=sa_exc.SAWarning)
         stmt = (
-            select(Comment, CommentVotes.vote_direction)
-            .join_from(
-                Comment, CommentVotes,
-                onclause=and_(
-                    CommentVotes.comment_id == Comment.comment_id,
-                    CommentVotes.user_id == user_id
-                ), isouter=True
-            )
+            _comment_select(user_id)
+            .where(Comment.post_id.in_(rtn.keys()))
+            .order_by(*_order_by(key_col, Comment.comment_id, order))
         )
 
-        if _s:
-            stmt = stmt.order_by(column)
         res = db.session.execute(stmt)
     items = res.all()
 
-    rtn = []
     for row in items:
         cmt, user_vote = row
-        if cmt.post_id == post_id:
-            d = cmt.to_dict()
-            d['total_votes'] = cmt.upvotes_cnt - cmt.dnvotes_cnt
-            d['user_vote'] = user_vote.value if user_vote else None
-            rtn.append(d)
-
-    if sort_by in {'total_votes', 'user_vote'}:
-        rtn = sorted(
-            rtn, 
-            key=lambda it: it[sort_by], 
-            reverse=(order == 'desc')
-        )
+        rtn[cmt.post_id].append(_comment_out(cmt, user_vote))
+
     return rtn
 
+# Rows per server-side cursor fetch when streaming
+STREAM_YIELD_PER = 500
+
+@replica_read
+def iter_comments_of_post(
+    user_id: int|None,
+    post_id: int,
+    sort_by: str = 'created_at',
+    order: str = 'asc'
+):
+    """All of a post's comments, with the caller's vote, as a lazy iterator of CommentOut.
+
+    Rows are fetched `STREAM_YIELD_PER` at a time through a server-side
+    cursor, so memory doesn't grow with the thread. Arguments are validated
+    up front; iterate inside the request (see flaskr.streaming). The rows
+    come from the same replica as the existence check.
+    """
+    order = _validate_order(order)
+    key_col = _sort_key(Comment, sort_by, CommentVotes.vote_direction)
+    if db.session.scalar(select(Post.post_id).where(Post.post_id == post_id)) is None:
+        raise ValueError("Post not found")
+
+    stmt = (
+        _comment_select(user_id, stream=True)
+        .where(Comment.post_id == post_id)
+        .order_by(*_order_by(key_col, Comment.comment_id, order))
+        .execution_options(yield_per=STREAM_YIELD_PER)
+    )
+    def rows():
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=sa_exc.SAWarning)
+            for cmt, user_vote in db.session.execute(stmt):
+                yield _comment_out(cmt, user_vote)
+    return rows()
+
+USER_VOTES_LIMIT = 1000
+
+def get_user_votes(user_id: int, post_ids: list[int], comment_ids: list[int]) -> dict[str, dict]:
+    """The caller's vote directions for just the given ids.
+
+    Served from the per-user vote cache where possible; any remaining ids are
+    read in one round trip against the (post_id|comment_id, user_id) primary keys.
+    """
+    if len(post_ids) + len(comment_ids) > USER_VOTES_LIMIT:
+        raise ValueError(f"At most {USER_VOTES_LIMIT} ids per request")
+
+    known = {}
+    missing = {}
+    # Taken before the read so a vote written through meanwhile wins
+    read_version = user_vote_cache.read_version()
+    for kind, ids in (('posts', post_ids), ('comments', comment_ids)):
+        known[kind], missing[kind] = user_vote_cache.lookup(user_id, kind, ids)
+
+    selects = []
+    if missing['posts']:
+        selects.append(
+            select(literal('posts').label('kind'), PostVotes.post_id.label('ident'), 
+                   PostVotes.vote_direction)
+            .where(PostVotes.post_id.in_(missing['posts']), PostVotes.user_id == user_id)
+        )
+    if missing['comments']:
+        selects.append(
+            select(literal('comments').label('kind'), CommentVotes.comment_id.label('ident'), 
+                   CommentVotes.vote_direction)
+            .where(CommentVotes.comment_id.in_(missing['comments']), CommentVotes.user_id == user_id)
+        )
+
+    if selects:
+        fetched = { kind: dict.fromkeys(ids) for kind, ids in missing.items() }
+        stmt = selects[0] if len(selects) == 1 else union_all(*selects)
+        for kind, ident, vote_direction in db.session.execute(stmt):
+            fetched[kind][ident] = vote_direction
+        for kind, directions in fetched.items():
+            user_vote_cache.store(user_id, kind, directions, read_version)
+            known[kind].update(directions)
+
+    return {
+        kind: {
+            ident: vote_direction.value
+            for ident, vote_direction in directions.items()
+            if vote_direction and vote_direction != VoteDirection.NONE
+        }
+        for kind, directions in known.items()
+    }
+
+@replica_read
+def get_comments_page_of_post(
+    user_id: int|None,
+    post_id: int,
+    sort_by: str = 'total_votes',
+    order: str = 'desc',
+    per_page: int = 20,
+    cursor: str|None = None
+) -> CommentPageOut:
+    """One keyset page of a post's comments; follow `next_cursor` to load more."""
+    order = _validate_order(order)
+    key_col = _sort_key(Comment, sort_by, CommentVotes.vote_direction)
+    position = decode_cursor(cursor, sort_by, order) if cursor else None
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=sa_exc.SAWarning)
+        stmt = apply_keyset(
+            _comment_select(user_id).where(Comment.post_id == post_id),
+            key_col, Comment.comment_id, order, per_page, position
+        )
+        rows = db.session.execute(stmt).all()
+
+    rows, pagination_info = keyset_page(
+        rows, per_page, position,
+        _cursor_factory(sort_by, order, 'comment_id', auth=True)
+    )
+    return CommentPageOut(
+        items=[_comment_out(cmt, user_vote) for cmt, user_vote in rows],
+        pagination=pagination_info
+    )
+
+@replica_read
+def get_post_detail(
+    user_id: int|None,
+    post_id: int,
+    sort_by: str = 'total_votes',
+    order: str = 'desc',
+    per_page: int = 20,
+    cursor: str|None = None
+) -> PostOut:
+    post = db.session.scalars(
+        select(Post)
+        .where(Post.post_id == post_id)
+        .options(*_feed_load_options(comments=False))
+    ).one_or_none()
+    if not post:
+        raise ValueError("Post not found")
+
+    user_vote = None
+    if user_id is not None:
+        vote = db.session.get(PostVotes, (post_id, user_id))
+        user_vote = vote.vote_direction if vote else None
+
+    comments = get_comments_page_of_post(
+        user_id, post_id, sort_by, order, per_page, cursor
+    )
+    # Maintained counter; exact unless comments were written outside the service layer
+    comments.pagination.total = post.comment_cnt
+    comments.pagination.approximate = True
+    return PostOut.from_model(post, user_vote=user_vote, comments=comments)
+
 def delete_post(user, post_id):
     from flaskr.services import UnauthorizedError
     #return {'msg': 'pass'}
@@ -275,6 +519,8 @@ def delete_post(user, post_id):
         raise UnauthorizedError
     post_dict = post.to_dict(comments=True)
     db.session.delete(post)
+    unindex_post(post_id)
+    bump_counter(POST_COUNTER, -1)
     db.session.commit()
     return {"message": "Post deleted successfully", "post": post_dict}
 
@@ -289,6 +535,12 @@ def delete_comment(user, comment_id):
         raise UnauthorizedError
     cmt_dict = comment.to_dict()
     db.session.delete(comment)
+    unindex_comment(comment_id)
+    db.session.execute(
+        update(Post)
+        .where(Post.post_id == comment.post_id)
+        .values(comment_cnt=Post.comment_cnt - 1, version=Post.version + 1)
+    )
     db.session.commit()
     return {"message": "Comment deleted successfully", "comment": cmt_dict}
 
@@ -300,6 +552,8 @@ def update_post(user_id, post_id, new_data):
         post.title = new_data["title"]
     if "content" in new_data:
         post.content = new_data["content"]
+    post.version = Post.version + 1
+    index_post(post)
     db.session.commit()
     return post.to_dict()
 
@@ -309,6 +563,9 @@ def update_comment(user_id, comment_id, new_data):
         return
     if "content" in new_data:
         comment.content = new_data["content"]
+    comment.version = Comment.version + 1
+    touch_comment_threads(Comment.comment_id == comment_id)
+    index_comment(comment)
     db.session.commit()
     return comment.to_dict()
 
@@ -319,10 +576,14 @@ def create_post(user_id, temp_id, title, content):
         temp_id=temp_id,
         title=title,
         content=content,
+        hot_rank=hot(0, 0, now),
         created_at=now,
         updated_at=now
     )
     db.session.add(new_post)
+    db.session.flush()
+    index_post(new_post)
+    bump_counter(POST_COUNTER, 1)
     db.session.commit()
     return new_post.to_dict()
 
@@ -337,155 +598,308 @@ def create_comment(user_id, post_id, content, temp_id):
         updated_at=now
     )
     db.session.add(new_comment)
+    db.session.flush()
+    index_comment(new_comment)
+    db.session.execute(
+        update(Post)
+        .where(Post.post_id == post_id)
+        .values(comment_cnt=Post.comment_cnt + 1, version=Post.version + 1)
+    )
     db.session.commit()
     return new_comment.to_dict()
 
-def handle_post_vote(post_id, vote_direction, user_id):
-    res = PostVotes.query.filter_by(post_id=post_id, user_id=user_id).first()
-    if not res:
-        # Create a new vote
-        if vote_direction.value == 'up':
-            inc_post_upvotes(post_id)
-        elif vote_direction.value == 'down':
-            inc_post_dnvotes(post_id)
-        else:
-            raise ValueError("wtf")
-        new_vote = PostVotes(
-            post_id=post_id,
-            user_id=user_id,
-            vote_direction=vote_direction
+def _upsert(model, values: dict|list[dict], update_cols: tuple[str, ...]):
+    """INSERT ... ON DUPLICATE KEY UPDATE (or ON CONFLICT DO UPDATE off MySQL)."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('mysql', 'mariadb'):
+        stmt = mysql.insert(model).values(values)
+        return stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in update_cols})
+    if dialect == 'sqlite':
+        stmt = sqlite.insert(model).values(values)
+        return stmt.on_conflict_do_update(
+            index_elements=[c.name for c in model.__table__.primary_key],
+            set_={c: stmt.excluded[c] for c in update_cols}
         )
-        db.session.add(new_vote)
-        db.session.commit()
-    elif ((res != None) and (res.vote_direction == vote_direction)):
-        # Remove / undo a vote
-        # 1) delete the table entry
-        db.session.delete(res)
-        # 2) decrement the corresponding counter
-        if res.vote_direction.value == 'up':
-            dec_post_upvotes(post_id)
-        elif res.vote_direction.value == 'down':
-            dec_post_dnvotes(post_id)
-        else:
-            raise ValueError("wtf")
-    elif ((res != None) and (res.vote_direction != vote_direction)):
-        # Change a vote from one direction to the other
-        old_direction = res.vote_direction.value
-        res.vote_direction = vote_direction
-        if old_direction == 'up':
-            dec_post_upvotes(post_id)
-            inc_post_dnvotes(post_id)
-        elif old_direction == 'down':
-            dec_post_dnvotes(post_id)
-            inc_post_upvotes(post_id)
-        else:
-            raise ValueError("wtf")
+    raise NotImplementedError(f"Upsert not supported for dialect {dialect!r}")
+
+def _apply_vote_delta(model, ident: int, d_up: int, d_dn: int) -> tuple[int, int, int]:
+    """Apply counter deltas with SQL-side arithmetic and refresh the rank; no commit.
+
+    Returns the new (up, down, total) from the same transaction.
+    """
+    id_col = model.__mapper__.primary_key[0]
+    stmt = (
+        update(model)
+        .where(id_col == ident)
+        .values(
+            upvotes_cnt=model.upvotes_cnt + d_up,
+            dnvotes_cnt=model.dnvotes_cnt + d_dn,
+            score=model.score + (d_up - d_dn),
+            version=model.version + 1
+        )
+        .execution_options(synchronize_session=False)
+    )
+    cols = (model.upvotes_cnt, model.dnvotes_cnt, model.score)
+    if model is Post:
+        cols += (Post.created_at,)
+
+    if db.session.get_bind().dialect.update_returning:
+        row = db.session.execute(stmt.returning(*cols)).one_or_none()
     else:
-        raise ValueError("wtf")
-    return get_post_votes(post_id)
+        db.session.execute(stmt)
+        row = db.session.execute(select(*cols).where(id_col == ident)).one_or_none()
+    if row is None:
+        raise ValueError(f"{model.__name__} not found")
 
-def handle_comment_vote(comment_id, vote_direction, user_id):
-    res = CommentVotes.query.filter_by(comment_id=comment_id, user_id=user_id).first()
-    if not res:
-        # Create a new vote
-        if vote_direction.value == 'up':
-            inc_comment_upvotes(comment_id)
-        elif vote_direction.value == 'down':
-            inc_comment_dnvotes(comment_id)
-        else:
-            raise ValueError("wtf")
-        new_vote = CommentVotes(
-            comment_id=comment_id,
-            user_id=user_id,
-            vote_direction=vote_direction
+    if model is Post:
+        rank = {'hot_rank': hot(row[0], row[1], row[3])}
+    else:
+        touch_comment_threads(Comment.comment_id == ident)
+        rank = {'best_rank': confidence(row[0], row[1])}
+    db.session.execute(
+        update(model)
+        .where(id_col == ident)
+        .values(**rank)
+        .execution_options(synchronize_session=False)
+    )
+    return row[0], row[1], row[2]
+
+def _cast_vote(vote_model, key: dict, vote_direction: VoteDirection) -> tuple[int, int, VoteDirection|None]:
+    """Toggle/insert/switch one user's vote row; no commit.
+
+    Voting the same direction twice removes the vote. Returns the (up, down)
+    deltas the target's counters need and the new direction.
+    """
+    if vote_direction not in (VoteDirection.UP, VoteDirection.DOWN):
+        raise ValueError(f"Invalid vote direction: {vote_direction}")
+    where = [getattr(vote_model, k) == v for k, v in key.items()]
+
+    # Lock the caller's vote row (or its gap) so concurrent toggles serialize
+    old = db.session.scalar(
+        select(vote_model.vote_direction).where(*where).with_for_update()
+    )
+    new = None if old == vote_direction else vote_direction
+    if new is None:
+        db.session.execute(
+            delete(vote_model).where(*where).execution_options(synchronize_session=False)
         )
-        db.session.add(new_vote)
-        db.session.commit()
-    elif ((res != None) and (res.vote_direction == vote_direction)):
-        # Remove / undo a vote
-        # 1) delete the table entry
-        db.session.delete(res)
-        # 2) decrement the corresponding counter
-        if res.vote_direction.value == 'up':
-            dec_comment_upvotes(comment_id)
-        elif res.vote_direction.value == 'down':
-            dec_comment_dnvotes(comment_id)
+    else:
+        db.session.execute(
+            _upsert(vote_model, {**key, 'vote_direction': new}, ('vote_direction',))
+        )
+
+    d_up = (new == VoteDirection.UP) - (old == VoteDirection.UP)
+    d_dn = (new == VoteDirection.DOWN) - (old == VoteDirection.DOWN)
+    return d_up, d_dn, new
+
+VOTE_CACHE_KINDS = {PostVotes: 'posts', CommentVotes: 'comments'}
+
+def _commit_vote(vote_model, target_model, key: dict, vote_direction: VoteDirection):
+    target_id = key[target_model.__mapper__.primary_key[0].key]
+    try:
+        d_up, d_dn, new = _cast_vote(vote_model, key, vote_direction)
+        if vote_buffer.enabled:
+            # Journaled with the vote row; counters are applied by the buffer's batched UPDATE
+            vote_buffer.add(target_model, [{'b_id': target_id, 'b_up': d_up, 'b_dn': d_dn}])
+            counts = vote_buffer.read_counts(target_model, [target_id]).get(target_id)
+            if counts is None:
+                raise ValueError(f"{target_model.__name__} not found")
         else:
-            raise ValueError("wtf")
-    elif ((res != None) and (res.vote_direction != vote_direction)):
-        # Change a vote from one direction to the other
-        old_direction = res.vote_direction.value
-        res.vote_direction = vote_direction
-        if old_direction == 'up':
-            dec_comment_upvotes(comment_id)
-            inc_comment_dnvotes(comment_id)
-        elif old_direction == 'down':
-            dec_comment_dnvotes(comment_id)
-            inc_comment_upvotes(comment_id)
+            counts = _apply_vote_delta(target_model, target_id, d_up, d_dn)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    user_vote_cache.store(key['user_id'], VOTE_CACHE_KINDS[vote_model], {target_id: new})
+    return counts
+
+def handle_post_vote(post_id, vote_direction, user_id):
+    return _commit_vote(
+        PostVotes, Post, {'post_id': post_id, 'user_id': user_id}, vote_direction
+    )
+
+def handle_comment_vote(comment_id, vote_direction, user_id):
+    return _commit_vote(
+        CommentVotes, Comment, {'comment_id': comment_id, 'user_id': user_id}, vote_direction
+    )
+
+# Bulk vote targets: kind -> (model, vote model, key column name)
+VOTE_TARGETS = {
+    'post': (Post, PostVotes, 'post_id'),
+    'comment': (Comment, CommentVotes, 'comment_id'),
+}
+BULK_VOTE_LIMIT = 500
+
+def handle_bulk_votes(user_id: int, votes: list[tuple[str, int, VoteDirection]]) -> BulkVotesOut:
+    """Apply a batch of (kind, id, direction) votes in one transaction.
+
+    Votes replay in order with the same toggle semantics as the single-vote
+    routes, are collapsed to one final state per target, then written with one
+    multi-row upsert, one DELETE and one grouped counter UPDATE per kind.
+    Votes on deleted targets are skipped and reported under `missing`, so a
+    client replaying an offline queue doesn't fail on them forever.
+    """
+    if len(votes) > BULK_VOTE_LIMIT:
+        raise ValueError(f"At most {BULK_VOTE_LIMIT} votes per request")
+
+    actions = { kind: {} for kind in VOTE_TARGETS }
+    for kind, ident, vote_direction in votes:
+        if kind not in VOTE_TARGETS:
+            raise ValueError(f"Invalid vote target: {kind!r}")
+        if vote_direction not in (VoteDirection.UP, VoteDirection.DOWN):
+            raise ValueError(f"Invalid vote direction: {vote_direction}")
+        actions[kind].setdefault(ident, []).append(vote_direction)
+
+    applied = []
+    missing = { f'{kind}s': [] for kind in VOTE_TARGETS }
+    try:
+        for kind, by_id in actions.items():
+            if not by_id:
+                continue
+            model, vote_model, fk = VOTE_TARGETS[kind]
+            id_col, vote_fk = getattr(model, fk), getattr(vote_model, fk)
+
+            found = set(db.session.scalars(select(id_col).where(id_col.in_(by_id))))
+            missing[f'{kind}s'] = sorted(by_id.keys() - found)
+            by_id = { ident: directions for ident, directions in by_id.items() if ident in found }
+            if not by_id:
+                continue
+
+            current = dict(db.session.execute(
+                select(vote_fk, vote_model.vote_direction)
+                .where(vote_model.user_id == user_id, vote_fk.in_(by_id))
+                .with_for_update()
+            ).all())
+
+            upserts, removals, deltas, finals = [], [], [], {}
+            for ident, directions in by_id.items():
+                old = current.get(ident)
+                old = None if old == VoteDirection.NONE else old
+                new = old
+                for vote_direction in directions:
+                    new = None if new == vote_direction else vote_direction
+                finals[ident] = new
+                if new == old:
+                    continue
+                if new is None:
+                    removals.append(ident)
+                else:
+                    upserts.append({fk: ident, 'user_id': user_id, 'vote_direction': new})
+                deltas.append({
+                    'b_id': ident,
+                    'b_up': (new == VoteDirection.UP) - (old == VoteDirection.UP),
+                    'b_dn': (new == VoteDirection.DOWN) - (old == VoteDirection.DOWN)
+                })
+
+            if upserts:
+                db.session.execute(_upsert(vote_model, upserts, ('vote_direction',)))
+            if removals:
+                db.session.execute(
+                    delete(vote_model)
+                    .where(vote_model.user_id == user_id, vote_fk.in_(removals))
+                    .execution_options(synchronize_session=False)
+                )
+            if deltas and vote_buffer.enabled:
+                vote_buffer.add(model, deltas)
+            elif deltas:
+                apply_vote_deltas(model, deltas)
+                rerank_rows(model, [d['b_id'] for d in deltas])
+            applied.append((kind, finals, deltas))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    rtn = { f'{kind}s': [] for kind in VOTE_TARGETS }
+    for kind, finals, deltas in applied:
+        model, vote_model, fk = VOTE_TARGETS[kind]
+        user_vote_cache.store(user_id, VOTE_CACHE_KINDS[vote_model], finals)
+        id_col = getattr(model, fk)
+        if vote_buffer.enabled:
+            rows = [(ident, *counts) for ident, counts in vote_buffer.read_counts(model, list(finals)).items()]
         else:
-            raise ValueError("wtf")
-    else:
-        raise ValueError("wtf")
-    return get_comment_votes(comment_id)
+            rows = db.session.execute(
+                select(id_col, model.upvotes_cnt, model.dnvotes_cnt, model.score)
+                .where(id_col.in_(finals))
+            ).all()
+        for ident, *counts in rows:
+            up, down, total = counts
+            rtn[f'{kind}s'].append(VoteCountsOut(
+                **{fk: ident},
+                up_votes=up,
+                down_votes=down,
+                total_votes=total,
+                user_vote=finals[ident]
+            ))
+    return BulkVotesOut(**rtn, missing=missing)
 
 def inc_post_upvotes(post_id):
-    post = Post.query.filter_by(post_id=post_id).first()
-    post.upvotes_cnt += 1
+    _apply_vote_delta(Post, post_id, 1, 0)
     db.session.commit()
-    return post
+    return db.session.get(Post, post_id)
     
 def dec_post_upvotes(post_id):
-    post = Post.query.filter_by(post_id=post_id).first()
-    post.upvotes_cnt -= 1
+    _apply_vote_delta(Post, post_id, -1, 0)
     db.session.commit()
-    return post
+    return db.session.get(Post, post_id)
 
 def inc_post_dnvotes(post_id):
-    post = Post.query.filter_by(post_id=post_id).first()
-    post.dnvotes_cnt += 1
+    _apply_vote_delta(Post, post_id, 0, 1)
     db.session.commit()
-    return post
+    return db.session.get(Post, post_id)
     
 def dec_post_dnvotes(post_id):
-    post = Post.query.filter_by(post_id=post_id).first()
-    post.dnvotes_cnt -= 1
+    _apply_vote_delta(Post, post_id, 0, -1)
     db.session.commit()
-    return post
+    return db.session.get(Post, post_id)
 
 def inc_comment_upvotes(comment_id):
-    comment = Comment.query.filter_by(comment_id=comment_id).first()
-    comment.upvotes_cnt += 1
+    _apply_vote_delta(Comment, comment_id, 1, 0)
     db.session.commit()
-    return comment
+    return db.session.get(Comment, comment_id)
 
 def dec_comment_upvotes(comment_id):
-    comment = Comment.query.filter_by(comment_id=comment_id).first()
-    comment.upvotes_cnt -= 1
+    _apply_vote_delta(Comment, comment_id, -1, 0)
     db.session.commit()
-    return comment
+    return db.session.get(Comment, comment_id)
 
 def inc_comment_dnvotes(comment_id):
-    comment = Comment.query.filter_by(comment_id=comment_id).first()
-    comment.dnvotes_cnt += 1
+    _apply_vote_delta(Comment, comment_id, 0, 1)
     db.session.commit()
-    return comment
+    return db.session.get(Comment, comment_id)
 
 def dec_comment_dnvotes(comment_id):
-    comment = Comment.query.filter_by(comment_id=comment_id).first()
-    comment.dnvotes_cnt -= 1
+    _apply_vote_delta(Comment, comment_id, 0, -1)
     db.session.commit()
-    return comment
+    return db.session.get(Comment, comment_id)
 
 def get_post_votes(post_id):
     post = Post.query.filter_by(post_id=post_id).first()
     up_votes = post.upvotes_cnt
     dn_votes = post.dnvotes_cnt
-    total_votes = up_votes - dn_votes
+    total_votes = post.score
     return up_votes, dn_votes, total_votes
     
 def get_comment_votes(comment_id):
     comment = Comment.query.filter_by(comment_id=comment_id).first()
     up_votes = comment.upvotes_cnt
     dn_votes = comment.dnvotes_cnt
-    total_votes = up_votes - dn_votes
-    return up_votes, dn_votes, total_votes
\ No newline at end of file
+    total_votes = comment.score
+    return up_votes, dn_votes, total_votes
+
+def recompute_vote_scores():
+    """Backfill `score` from the vote counters (e.g. after adding the column)."""
+    posts = db.session.execute(
+        update(Post)
+        .where(Post.score != Post.upvotes_cnt - Post.dnvotes_cnt)
+        .values(score=Post.upvotes_cnt - Post.dnvotes_cnt, version=Post.version + 1)
+    ).rowcount
+    stale = Comment.score != Comment.upvotes_cnt - Comment.dnvotes_cnt
+    touch_comment_threads(stale)
+    comments = db.session.execute(
+        update(Comment)
+        .where(stale)
+        .values(score=Comment.upvotes_cnt - Comment.dnvotes_cnt, version=Comment.version + 1)
+    ).rowcount
+    db.session.commit()
+    return posts, comments
\ No newline at end of file
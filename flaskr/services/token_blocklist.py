@@ -0,0 +1,83 @@
+"""\
+    Revoked JWT ids (jti), checked on every protected request
+
+    Revocations are kept in a local dict until the token would have expired
+    anyway, so the common check is one dict lookup. Tokens without `exp`
+    (development tokens never expire) stay revoked for good. With a shared backend
+    (a cachelib cache, e.g. RedisCache; SimpleCache stands in locally) other
+    workers' revocations are seen through one backend GET on a local miss;
+    the database is never involved.
+"""
+import heapq
+import math
+import threading
+import time
+
+from flaskr.cache import shared_backend
+
+class TokenBlocklist:
+    def __init__(self):
+        self.backend = None
+        self._lock = threading.Lock()
+        self._revoked: dict[str, float] = {}
+        self._expiries: list[tuple[float, str]] = []
+
+    def init_app(self, app):
+        config = app.config
+        # A cachelib-compatible instance; falls back to CACHE_REDIS_URL
+        config.setdefault('TOKEN_BLOCKLIST_BACKEND', None)
+
+        self.backend = shared_backend(config['TOKEN_BLOCKLIST_BACKEND'])
+        self.clear()
+        app.extensions['token_blocklist'] = self
+
+    @staticmethod
+    def _key(jti: str) -> str:
+        return f'revoked:{jti}'
+
+    def _remember(self, jti: str, expires: float, now: float):
+        with self._lock:
+            # Evict whatever has expired; amortized over revocations
+            while self._expiries and self._expiries[0][0] <= now:
+                _, old = heapq.heappop(self._expiries)
+                if self._revoked.get(old, now + 1) <= now:
+                    del self._revoked[old]
+            self._revoked[jti] = expires
+            if expires != math.inf:
+                heapq.heappush(self._expiries, (expires, jti))
+
+    def revoke(self, jti: str, exp: int|None = None):
+        """Revoke a token until its `exp` (epoch seconds), or for good without one."""
+        now = time.time()
+        if exp is None:
+            expires, timeout = math.inf, 0
+        else:
+            expires = float(exp)
+            if expires <= now:
+                return
+            timeout = int(expires - now) + 1
+        self._remember(jti, expires, now)
+        if self.backend is not None:
+            # cachelib: a timeout of 0 never expires
+            self.backend.set(self._key(jti), expires, timeout=timeout)
+
+    def is_revoked(self, jti: str) -> bool:
+        now = time.time()
+        expires = self._revoked.get(jti)
+        if expires is not None:
+            return expires > now
+        if self.backend is None:
+            return False
+        expires = self.backend.get(self._key(jti))
+        if expires is None:
+            return False
+        # Revoked by another worker; keep it locally so later checks stay local
+        self._remember(jti, float(expires), now)
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._revoked.clear()
+            self._expiries.clear()
+
+token_blocklist = TokenBlocklist()
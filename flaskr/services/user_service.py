@@ -1,10 +1,55 @@
 from flask_jwt_extended.exceptions import NoAuthorizationError
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 from flaskr.extensions import db
-from flaskr.models.user import User
+from flaskr.replicas import replica_read
+from flaskr.models.user import User, UserDetail
+from flaskr.schemas import UserOut, UserRefOut, UserSearchOut
+from .username_index import username_index
 
-def get_user_info_by_id(user_id):
+@replica_read
+def get_user_info_by_id(user_id) -> UserOut:
     user = User.query.filter_by(user_id=user_id).first()
-    return user.to_dict()
+    return UserOut.from_model(user)
+
+def iter_users(yield_per: int = 500):
+    """Every user as UserOut, fetched `yield_per` rows at a time through a server-side cursor."""
+    stmt = (
+        select(User)
+        .options(selectinload(User.user_detail))
+        .execution_options(yield_per=yield_per)
+    )
+    for user in db.session.scalars(stmt):
+        yield UserOut.from_model(user)
+
+USER_SEARCH_LIMIT = 50
+
+def search_usernames(prefix: str, limit: int = 10) -> UserSearchOut:
+    """Usernames starting with `prefix`, served from the in-memory index."""
+    prefix = (prefix or '').strip().lstrip('@')
+    if not prefix:
+        raise ValueError("prefix is required")
+    limit = min(max(limit, 1), USER_SEARCH_LIMIT)
+    return UserSearchOut(items=[
+        UserRefOut(user_id=user_id, username=username)
+        for user_id, username in username_index.search(prefix, limit)
+    ])
+
+@replica_read
+def user_version(user_id):
+    """(parts, last_modified) for conditional GETs; None if the user doesn't exist.
+
+    The parts are the rendered fields themselves: `updated_at` has one-second
+    resolution and doesn't move when the detail row changes.
+    """
+    row = db.session.execute(
+        select(User.username, User.updated_at, UserDetail.f_name, UserDetail.l_name, UserDetail.bio)
+        .join_from(User, UserDetail, isouter=True)
+        .where(User.user_id == user_id)
+    ).one_or_none()
+    if row is None:
+        return None
+    return (user_id, *row), row.updated_at
 
 def get_user_info_by_id_bad(user_id, requesting_user: User|None=None):
     pass
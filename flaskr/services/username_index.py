@@ -0,0 +1,92 @@
+"""\
+    In-memory username prefix index for @mention autocomplete
+"""
+import threading
+import time
+from bisect import bisect_left, bisect_right
+
+from sqlalchemy import select
+from flaskr.models import User
+from flaskr.extensions import db
+
+class UsernameIndex:
+    """Sorted parallel arrays of (casefolded username, username, user_id).
+
+    Built from the `user` table on first use; `add()` inserts new users in
+    place. Usernames are never renamed, so other workers' signups are picked
+    up every `sync_interval` seconds with a cheap `user_id > max seen` read.
+    """
+
+    def __init__(self):
+        self.sync_interval = 30.0
+        self._lock = threading.Lock()
+        self._keys: list[str] = []
+        self._names: list[str] = []
+        self._ids: list[int] = []
+        # Highest user_id read from the table; ids added locally since then
+        self._synced_max = 0
+        self._added: set[int] = set()
+        self._synced_at = None
+
+    def init_app(self, app):
+        app.config.setdefault('USERNAME_INDEX_SYNC_INTERVAL', 30.0)
+        self.sync_interval = app.config['USERNAME_INDEX_SYNC_INTERVAL']
+        self.clear()
+        app.extensions['username_index'] = self
+
+    def clear(self):
+        with self._lock:
+            self._keys, self._names, self._ids = [], [], []
+            self._synced_max = 0
+            self._added = set()
+            self._synced_at = None
+
+    def _insert(self, user_id: int, username: str):
+        key = username.casefold()
+        i = bisect_right(self._keys, key)
+        self._keys.insert(i, key)
+        self._names.insert(i, username)
+        self._ids.insert(i, user_id)
+
+    def _sync(self):
+        """Load the whole table on first use, then only users newer than the last one seen."""
+        if (self._synced_at is not None) and (time.monotonic() - self._synced_at < self.sync_interval):
+            return
+        synced_max = self._synced_max
+        rows = db.session.execute(
+            select(User.user_id, User.username).where(User.user_id > synced_max)
+        ).all()
+        with self._lock:
+            if self._synced_max != synced_max:
+                return  # Another thread synced meanwhile
+            if self._synced_at is None:
+                rows = sorted(rows, key=lambda r: r.username.casefold())
+                self._keys = [r.username.casefold() for r in rows]
+                self._names = [r.username for r in rows]
+                self._ids = [r.user_id for r in rows]
+            else:
+                for user_id, username in rows:
+                    if user_id not in self._added:
+                        self._insert(user_id, username)
+            self._synced_max = max((r.user_id for r in rows), default=synced_max)
+            self._added = { i for i in self._added if i > self._synced_max }
+            self._synced_at = time.monotonic()
+
+    def add(self, user_id: int, username: str):
+        with self._lock:
+            # Before the first sync the full load will include it
+            if self._synced_at is not None:
+                self._insert(user_id, username)
+                self._added.add(user_id)
+
+    def search(self, prefix: str, limit: int = 10) -> list[tuple[int, str]]:
+        """Up to `limit` (user_id, username) whose username starts with `prefix`, case-insensitively."""
+        self._sync()
+        key = prefix.casefold()
+        with self._lock:
+            start = bisect_left(self._keys, key)
+            # Every key with this prefix sorts before prefix + U+10FFFF
+            end = min(bisect_right(self._keys, key + '\U0010ffff', lo=start), start + limit)
+            return list(zip(self._ids[start:end], self._names[start:end]))
+
+username_index = UsernameIndex()
@@ -0,0 +1,234 @@
+"""\
+    Write-behind aggregation of vote counter deltas
+
+    Vote rows are still written synchronously by the vote handlers; only the
+    `upvotes_cnt`/`dnvotes_cnt`/`score` deltas are deferred. Each vote
+    journals its deltas as a `PendingVoteDelta` row in its own transaction,
+    and every `VOTE_FLUSH_INTERVAL` seconds a worker applies the journal as
+    one batched UPDATE per model and deletes the rows it applied, in one
+    transaction. A viral post's row is locked once per flush instead of once
+    per vote, and a worker that dies (SIGKILL, OOM, a timeout) loses nothing:
+    its votes' deltas are committed rows that the next flush, by any worker
+    or `flask flush-votes`, applies.
+"""
+import atexit
+import os
+import threading
+from collections import defaultdict
+
+from sqlalchemy import select, update, insert, delete, bindparam, func
+from flaskr.models import Post, Comment, PostVotes, CommentVotes, PendingVoteDelta
+from flaskr.extensions import db
+from flaskr.struct import VoteDirection
+from .ranking import hot, confidence, refresh_ranks
+
+# PendingVoteDelta.target values
+TARGETS = {Post: 'post', Comment: 'comment'}
+MODELS = {target: model for model, target in TARGETS.items()}
+
+class VoteBuffer:
+    def __init__(self):
+        self.app = None
+        self.interval = 0.25
+        self.batch_size = 10000
+        self._enabled = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        app.config.setdefault('VOTE_WRITE_BEHIND', os.getenv('VOTE_WRITE_BEHIND', '').lower() in ('1', 'true'))
+        app.config.setdefault('VOTE_FLUSH_INTERVAL', float(os.getenv('VOTE_FLUSH_INTERVAL', 0.25)))
+        # Journal rows applied per flush transaction
+        app.config.setdefault('VOTE_FLUSH_BATCH', int(os.getenv('VOTE_FLUSH_BATCH', 10000)))
+        app.extensions['vote_buffer'] = self
+
+        self.app = app
+        self.interval = app.config['VOTE_FLUSH_INTERVAL']
+        self.batch_size = app.config['VOTE_FLUSH_BATCH']
+        self._enabled = bool(app.config['VOTE_WRITE_BEHIND'])
+        if self._enabled and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='vote-flusher', daemon=True)
+            self._thread.start()
+            # Apply what's journaled on a clean shutdown; anything left waits for the next flush
+            atexit.register(self.shutdown)
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def add(self, model, rows: list[dict]):
+        """Journal deltas in the caller's transaction; rows as for apply_vote_deltas. No commit.
+
+        They commit or roll back together with the vote rows.
+        """
+        rows = [
+            {'target': TARGETS[model], 'target_id': r['b_id'], 'd_up': r['b_up'], 'd_dn': r['b_dn']}
+            for r in rows if (r['b_up'] or r['b_dn'])
+        ]
+        if rows:
+            db.session.execute(insert(PendingVoteDelta), rows)
+
+    def read_counts(self, model, ids: list[int]) -> dict[int, tuple[int, int, int]]:
+        """Stored (up, down, total) per id with the journaled deltas added."""
+        if not ids:
+            return {}
+        id_col = model.__mapper__.primary_key[0]
+        counts = {
+            ident: [up, dn] for ident, up, dn in db.session.execute(
+                select(id_col, model.upvotes_cnt, model.dnvotes_cnt).where(id_col.in_(ids))
+            )
+        }
+        pending = db.session.execute(
+            select(PendingVoteDelta.target_id, func.sum(PendingVoteDelta.d_up), func.sum(PendingVoteDelta.d_dn))
+            .where(PendingVoteDelta.target == TARGETS[model], PendingVoteDelta.target_id.in_(ids))
+            .group_by(PendingVoteDelta.target_id)
+        )
+        for ident, d_up, d_dn in pending:
+            if ident in counts:
+                counts[ident][0] += d_up
+                counts[ident][1] += d_dn
+        return {ident: (up, dn, up - dn) for ident, (up, dn) in counts.items()}
+
+    def flush(self) -> int:
+        """Apply one batch of journaled deltas in one transaction; returns the journal rows applied."""
+        try:
+            journal = db.session.execute(
+                select(PendingVoteDelta.delta_id, PendingVoteDelta.target, PendingVoteDelta.target_id,
+                       PendingVoteDelta.d_up, PendingVoteDelta.d_dn)
+                .order_by(PendingVoteDelta.delta_id)
+                .limit(self.batch_size)
+                # Concurrent flushers (other workers) take disjoint rows
+                .with_for_update(skip_locked=True)
+            ).all()
+            grouped = defaultdict(lambda: defaultdict(lambda: [0, 0]))
+            for _, target, ident, d_up, d_dn in journal:
+                delta = grouped[MODELS[target]][ident]
+                delta[0] += d_up
+                delta[1] += d_dn
+            for model, deltas in grouped.items():
+                rows = [
+                    {'b_id': ident, 'b_up': d_up, 'b_dn': d_dn}
+                    for ident, (d_up, d_dn) in deltas.items() if (d_up or d_dn)
+                ]
+                if rows:
+                    apply_vote_deltas(model, rows)
+                    rerank_rows(model, [r['b_id'] for r in rows])
+            if journal:
+                db.session.execute(
+                    delete(PendingVoteDelta)
+                    .where(PendingVoteDelta.delta_id.in_([row[0] for row in journal]))
+                    .execution_options(synchronize_session=False)
+                )
+            db.session.commit()
+        except Exception:
+            # The journal rows stay for the next attempt
+            db.session.rollback()
+            raise
+        # No cache invalidation: the flush bumps row versions, which feed pages
+        # and ETags are keyed on
+        return len(journal)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self.app.app_context():
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f'vote flush failed: {e}')
+
+    def shutdown(self):
+        self._stop.set()
+        if self.app is not None:
+            with self.app.app_context():
+                self.flush()
+
+
+def apply_vote_deltas(model, rows: list[dict]):
+    """Add grouped deltas to counters; rows are {'b_id', 'b_up', 'b_dn'}. No commit."""
+    table = model.__table__
+    id_col = table.c[model.__mapper__.primary_key[0].name]
+    stmt = (
+        update(table)
+        .where(id_col == bindparam('b_id'))
+        .values(
+            upvotes_cnt=table.c.upvotes_cnt + bindparam('b_up'),
+            dnvotes_cnt=table.c.dnvotes_cnt + bindparam('b_dn'),
+            score=table.c.score + bindparam('b_up') - bindparam('b_dn'),
+            version=table.c.version + 1
+        )
+    )
+    # executemany: one statement batch for every buffered row
+    db.session.execute(stmt, rows)
+    if model is Comment:
+        touch_comment_threads(Comment.comment_id.in_([row['b_id'] for row in rows]))
+
+def touch_comment_threads(comments):
+    """Bump `comments_version` on the posts of the comments matching `comments`. No commit.
+
+    Call it wherever a comment's `version` is bumped.
+    """
+    db.session.execute(
+        update(Post)
+        .where(Post.post_id.in_(select(Comment.post_id).where(comments)))
+        .values(comments_version=Post.comments_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+def rerank_rows(model, ids: list[int]):
+    """Recompute hot/best rank for the given ids from their stored counters. No commit."""
+    table = model.__table__
+    id_col = table.c[model.__mapper__.primary_key[0].name]
+    if model is Post:
+        rows = db.session.execute(
+            select(id_col, table.c.upvotes_cnt, table.c.dnvotes_cnt, table.c.created_at)
+            .where(id_col.in_(ids))
+        ).all()
+        rank_col, ranks = 'hot_rank', [{'b_id': r[0], 'b_rank': hot(r[1], r[2], r[3])} for r in rows]
+    else:
+        rows = db.session.execute(
+            select(id_col, table.c.upvotes_cnt, table.c.dnvotes_cnt).where(id_col.in_(ids))
+        ).all()
+        rank_col, ranks = 'best_rank', [{'b_id': r[0], 'b_rank': confidence(r[1], r[2])} for r in rows]
+    if ranks:
+        db.session.execute(
+            update(table).where(id_col == bindparam('b_id')).values({rank_col: bindparam('b_rank')}),
+            ranks
+        )
+
+def _reconcile(model, vote_model, fk: str) -> int:
+    vote_fk = getattr(vote_model, fk)
+    id_col = getattr(model, fk)
+    def tally(direction):
+        return (
+            select(func.count())
+            .select_from(vote_model)
+            .where(vote_fk == id_col, vote_model.vote_direction == direction)
+            .scalar_subquery()
+        )
+    ups, dns = tally(VoteDirection.UP), tally(VoteDirection.DOWN)
+    stale = (model.upvotes_cnt != ups) | (model.dnvotes_cnt != dns) | (model.score != ups - dns)
+    if model is Comment:
+        touch_comment_threads(stale)
+    return db.session.execute(
+        update(model)
+        .where(stale)
+        .values(upvotes_cnt=ups, dnvotes_cnt=dns, score=ups - dns, version=model.version + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+def reconcile_vote_counts() -> tuple[int, int]:
+    """Rebuild counters from the vote rows, e.g. after a manual data fix.
+
+    Vote rows are always written synchronously, so they are the source of
+    truth. The journal is cleared in the same transaction, since the vote
+    rows already include its deltas; a vote committing while this runs may
+    need another run.
+    """
+    db.session.execute(delete(PendingVoteDelta))
+    posts = _reconcile(Post, PostVotes, 'post_id')
+    comments = _reconcile(Comment, CommentVotes, 'comment_id')
+    db.session.commit()
+    refresh_ranks()
+    return posts, comments
+
+vote_buffer = VoteBuffer()
@@ -0,0 +1,170 @@
+"""\
+    In-process cache of active users' vote state for "did I vote" lookups
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flaskr.struct import VoteDirection
+
+# Directions are stored as small ints; 0 records a known absence of a vote
+_CODES = {VoteDirection.UP: 1, VoteDirection.DOWN: -1}
+_DIRECTIONS = {1: VoteDirection.UP, -1: VoteDirection.DOWN}
+KINDS = ('posts', 'comments')
+
+class _UserVotes:
+    __slots__ = ('expires', 'written', 'posts', 'comments')
+
+    def __init__(self, expires: float):
+        self.expires = expires
+        # Write version of this user's last write-through
+        self.written = 0
+        self.posts: dict[int, int] = {}
+        self.comments: dict[int, int] = {}
+
+    def __len__(self):
+        return len(self.posts) + len(self.comments)
+
+
+class UserVoteCache:
+    """LRU of user_id -> {post/comment id: direction code}, bounded by users and total ids.
+
+    Entries only ever hold what the database said or what this process wrote
+    through, and expire after `ttl` seconds so votes made through another
+    worker are picked up.
+
+    Every write-through takes a new write version. Read results are stored
+    with the version taken before the read (`read_version()`) and dropped if
+    the user was written since, so a slow read can't overwrite a newer vote.
+    """
+
+    def __init__(self):
+        self.max_users = 10000
+        self.max_ids = 500000
+        self.max_ids_per_user = 5000
+        self.ttl = 60.0
+        self._enabled = True
+        self._lock = threading.Lock()
+        self._users: OrderedDict[int, _UserVotes] = OrderedDict()
+        self._size = 0
+        self._version = 0
+        # Newest write version among dropped entries, which no longer carry it
+        self._dropped_written = 0
+
+    def init_app(self, app):
+        config = app.config
+        config.setdefault('USER_VOTE_CACHE_ENABLED', True)
+        config.setdefault('USER_VOTE_CACHE_MAX_USERS', 10000)
+        config.setdefault('USER_VOTE_CACHE_MAX_IDS', 500000)
+        config.setdefault('USER_VOTE_CACHE_MAX_IDS_PER_USER', 5000)
+        config.setdefault('USER_VOTE_CACHE_TTL', float(os.getenv('USER_VOTE_CACHE_TTL', 60)))
+
+        self._enabled = bool(config['USER_VOTE_CACHE_ENABLED'])
+        self.max_users = config['USER_VOTE_CACHE_MAX_USERS']
+        self.max_ids = config['USER_VOTE_CACHE_MAX_IDS']
+        self.max_ids_per_user = config['USER_VOTE_CACHE_MAX_IDS_PER_USER']
+        self.ttl = config['USER_VOTE_CACHE_TTL']
+        self.clear()
+        app.extensions['user_vote_cache'] = self
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def _entry(self, user_id: int, create: bool) -> _UserVotes|None:
+        entry = self._users.get(user_id)
+        now = time.monotonic()
+        if entry is not None and entry.expires <= now:
+            self._drop(user_id)
+            entry = None
+        if entry is None and create:
+            entry = self._users[user_id] = _UserVotes(now + self.ttl)
+            # A dropped entry's write version may have been this user's
+            entry.written = self._dropped_written
+        if entry is not None:
+            self._users.move_to_end(user_id)
+        return entry
+
+    def _drop(self, user_id: int):
+        entry = self._users.pop(user_id, None)
+        if entry is not None:
+            self._size -= len(entry)
+            self._dropped_written = max(self._dropped_written, entry.written)
+
+    def _written_since(self, user_id: int, since: int) -> bool:
+        entry = self._users.get(user_id)
+        written = entry.written if entry is not None else self._dropped_written
+        return written > since
+
+    def read_version(self) -> int:
+        """Version to pass to `store()` with the results of a read that starts now."""
+        with self._lock:
+            return self._version
+
+    def lookup(self, user_id: int, kind: str, ids: list[int]) -> tuple[dict[int, VoteDirection|None], list[int]]:
+        """Split `ids` into cached {id: direction or None} and ids that need a database read."""
+        if not self._enabled:
+            return {}, list(ids)
+        found, missing = {}, []
+        with self._lock:
+            entry = self._entry(user_id, create=False)
+            votes = getattr(entry, kind) if entry else {}
+            for ident in ids:
+                code = votes.get(ident)
+                if code is None:
+                    missing.append(ident)
+                else:
+                    found[ident] = _DIRECTIONS.get(code)
+        return found, missing
+
+    def store(
+        self,
+        user_id: int,
+        kind: str,
+        directions: dict[int, VoteDirection|None],
+        read_version: int|None = None
+    ):
+        """Record known vote state (None = no vote).
+
+        Pass `read_version` for read results; without it the store is a
+        write-through of committed votes.
+        """
+        if not self._enabled or not directions:
+            return
+        with self._lock:
+            if read_version is not None and self._written_since(user_id, read_version):
+                # Written through since the read began; its results may be stale
+                return
+            entry = self._entry(user_id, create=True)
+            if read_version is None:
+                self._version += 1
+                entry.written = self._version
+            votes = getattr(entry, kind)
+            for ident, vote_direction in directions.items():
+                if ident not in votes:
+                    self._size += 1
+                votes[ident] = _CODES.get(vote_direction, 0)
+            # Per-user bound: drop this user's oldest ids first
+            while len(entry) > self.max_ids_per_user:
+                oldest = entry.posts if len(entry.posts) >= len(entry.comments) else entry.comments
+                oldest.pop(next(iter(oldest)))
+                self._size -= 1
+            # Global bounds: evict least recently used users
+            while (len(self._users) > self.max_users) or (self._size > self.max_ids):
+                self._drop(next(iter(self._users)))
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            # Counts as a write, so reads already in flight don't store
+            self._version += 1
+            self._dropped_written = self._version
+            self._drop(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+            self._size = 0
+            self._dropped_written = self._version
+
+user_vote_cache = UserVoteCache()
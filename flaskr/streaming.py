@@ -0,0 +1,71 @@
+"""\
+    Streamed JSON array / NDJSON responses with negotiated gzip
+
+    Items are encoded one at a time as the iterable (typically a `yield_per`
+    query) produces them, so memory stays flat however many rows there are.
+"""
+import zlib
+
+from flask import current_app, request, stream_with_context
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+# Bytes collected before a chunk is written (and compressed)
+CHUNK_SIZE = 16 * 1024
+GZIP_LEVEL = 6
+
+def wants_ndjson() -> bool:
+    if request.args.get('format', '').lower() == 'ndjson':
+        return True
+    best = request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+def accepts_gzip() -> bool:
+    return request.accept_encodings['gzip'] > 0
+
+def _json_array(items, encode):
+    sep = b'['
+    for item in items:
+        yield sep + encode(item)
+        sep = b','
+    yield b'[]' if sep == b'[' else b']'
+
+def _ndjson(items, encode):
+    for item in items:
+        yield encode(item) + b'\n'
+
+def _buffered(chunks, size: int = CHUNK_SIZE):
+    buf, buffered = [], 0
+    for chunk in chunks:
+        buf.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            yield b''.join(buf)
+            buf, buffered = [], 0
+    if buf:
+        yield b''.join(buf)
+
+def _gzip(chunks, level: int = GZIP_LEVEL):
+    # wbits 16 + MAX_WBITS writes a gzip header and trailer
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+def stream_json(items, ndjson: bool|None = None):
+    """Stream `items` as a JSON array, or NDJSON when the client asks for it."""
+    encode = current_app.json.dumps_bytes
+    if ndjson is None:
+        ndjson = wants_ndjson()
+    chunks = _buffered((_ndjson if ndjson else _json_array)(items, encode))
+
+    headers = {'Vary': 'Accept-Encoding'}
+    if accepts_gzip():
+        chunks = _gzip(chunks)
+        headers['Content-Encoding'] = 'gzip'
+    return current_app.response_class(
+        stream_with_context(chunks),
+        mimetype=NDJSON_MIMETYPE if ndjson else 'application/json',
+        headers=headers
+    )
@@ -0,0 +1,49 @@
+import uuid
+
+import pytest
+
+from flaskr import create_app
+from flaskr.extensions import db
+from flaskr.models import User
+
+PASSWORD = 'password'
+
+def build_app(tmp_path, **config):
+    app = create_app({
+        'TESTING': True,
+        'FLASK_ENV': 'testing',
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.db'}",
+        # Hash inline and cheaply; the process pool isn't what's under test
+        'PASSWORD_HASH_WORKERS': 0,
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        **config
+    })
+    with app.app_context():
+        db.create_all()
+    return app
+
+@pytest.fixture
+def app(tmp_path):
+    app = build_app(tmp_path)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def make_user(username: str) -> int:
+    user = User(username, PASSWORD)
+    db.session.add(user)
+    db.session.commit()
+    return user.user_id
+
+def temp_id() -> str:
+    return str(uuid.uuid4())
+
+def auth_headers(client, username: str) -> dict:
+    res = client.post('/auth/login', json={'email': username, 'password': PASSWORD})
+    assert res.status_code == 200, res.get_json()
+    return {'Authorization': f"Bearer {res.get_json()['token']}"}
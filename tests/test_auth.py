@@ -0,0 +1,37 @@
+import time
+
+from flaskr.extensions import db
+from flaskr.models import User
+from flaskr.services.token_blocklist import TokenBlocklist
+
+from conftest import make_user, auth_headers
+
+def test_deleted_user_token_is_rejected(app, client):
+    with app.app_context():
+        user_id = make_user('gone@example.com')
+    headers = auth_headers(client, 'gone@example.com')
+    assert client.get('/social_media/votes', headers=headers).status_code == 200
+
+    with app.app_context():
+        db.session.delete(db.session.get(User, user_id))
+        db.session.commit()
+
+    assert client.get('/social_media/votes', headers=headers).status_code == 401
+
+def test_logged_out_token_is_rejected(app, client):
+    with app.app_context():
+        make_user('leaving@example.com')
+    headers = auth_headers(client, 'leaving@example.com')
+    assert client.post('/auth/logout', headers=headers).status_code == 200
+    assert client.get('/social_media/votes', headers=headers).status_code == 401
+
+def test_revocation_without_exp_never_lapses(monkeypatch):
+    blocklist = TokenBlocklist()
+    blocklist.revoke('forever')
+    blocklist.revoke('soon', exp=int(time.time()) + 60)
+    # A year on; revoking another token evicts whatever has expired
+    later = time.time() + 365 * 24 * 3600
+    monkeypatch.setattr(time, 'time', lambda: later)
+    blocklist.revoke('other', exp=int(later) + 60)
+    assert blocklist.is_revoked('forever')
+    assert not blocklist.is_revoked('soon')
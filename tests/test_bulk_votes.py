@@ -0,0 +1,57 @@
+from flaskr.services import create_post, create_comment
+
+from conftest import make_user, temp_id, auth_headers
+
+def _content(app):
+    with app.app_context():
+        author = make_user('author@example.com')
+        make_user('voter@example.com')
+        post_id = create_post(author, temp_id(), 'title', 'content')['post_id']
+        comment_id = create_comment(author, post_id, 'comment', temp_id())['comment_id']
+    return author, post_id, comment_id
+
+def _bulk(client, headers, *votes):
+    return client.post('/social_media/votes', headers=headers, json={
+        'votes': [{'type': kind, 'id': ident, 'vote': vote} for kind, ident, vote in votes]
+    })
+
+def test_bulk_votes_replay_in_order(app, client):
+    _, post_id, comment_id = _content(app)
+    voter = auth_headers(client, 'voter@example.com')
+    res = _bulk(client, voter,
+                ('post', post_id, 'up'), ('post', post_id, 'down'),
+                ('comment', comment_id, 'up'), ('comment', comment_id, 'up'))
+    assert res.status_code == 200
+    body = res.get_json()
+    # up then down switches; up twice toggles off
+    assert body['posts'] == [{'post_id': post_id, 'up_votes': 0, 'down_votes': 1,
+                              'total_votes': -1, 'user_vote': 'down'}]
+    assert body['comments'][0]['up_votes'] == 0
+    assert body['comments'][0]['user_vote'] is None
+    assert body['missing'] == {'posts': [], 'comments': []}
+
+    votes = client.get('/social_media/votes', headers=voter,
+                       query_string={'post_ids': post_id, 'comment_ids': comment_id}).get_json()
+    assert votes['user_votes'] == {'posts': {str(post_id): 'down'}, 'comments': {}}
+
+def test_bulk_votes_skip_deleted_targets(app, client):
+    author, post_id, comment_id = _content(app)
+    with app.app_context():
+        gone = create_post(author, temp_id(), 'gone', 'content')['post_id']
+    # Deleted after the client queued its vote
+    owner = auth_headers(client, 'author@example.com')
+    assert client.delete(f'/social_media/post/{gone}', headers=owner).status_code == 200
+    voter = auth_headers(client, 'voter@example.com')
+    res = _bulk(client, voter, ('post', gone, 'up'), ('post', post_id, 'up'), ('comment', 9999, 'down'))
+    assert res.status_code == 200
+    body = res.get_json()
+    assert [post['post_id'] for post in body['posts']] == [post_id]
+    assert body['posts'][0]['up_votes'] == 1
+    assert body['missing'] == {'posts': [gone], 'comments': [9999]}
+
+def test_bulk_votes_reject_invalid_payloads(app, client):
+    _, post_id, _ = _content(app)
+    voter = auth_headers(client, 'voter@example.com')
+    assert _bulk(client, voter, ('post', post_id, 'sideways')).status_code == 400
+    assert _bulk(client, voter, ('user', post_id, 'up')).status_code == 400
+    assert _bulk(client, voter, *[('post', post_id, 'up')] * 501).status_code == 400
@@ -0,0 +1,40 @@
+import json
+
+from flaskr.services import create_post, create_comment
+
+from conftest import make_user, temp_id
+
+def _thread(app, users: int = 3, rounds: int = 2) -> tuple[int, list[int]]:
+    with app.app_context():
+        user_ids = [make_user(f'user{i}@example.com') for i in range(users)]
+        post_id = create_post(user_ids[0], temp_id(), 'title', 'content')['post_id']
+        for i, user_id in enumerate(user_ids * rounds):
+            create_comment(user_id, post_id, f'comment {i}', temp_id())
+    return post_id, user_ids
+
+def test_stream_comments_from_several_users(app, client):
+    post_id, user_ids = _thread(app)
+
+    res = client.get(f'/social_media/{post_id}/comments')
+
+    assert res.status_code == 200
+    comments = json.loads(res.get_data())
+    assert [c['content'] for c in comments] == [f'comment {i}' for i in range(6)]
+    assert [c['author']['user_id'] for c in comments] == user_ids * 2
+    assert all(c['user_vote'] is None for c in comments)
+
+def test_stream_comments_ndjson(app, client):
+    post_id, _ = _thread(app, users=2, rounds=1)
+
+    res = client.get(f'/social_media/{post_id}/comments?format=ndjson')
+
+    assert res.status_code == 200
+    assert res.mimetype == 'application/x-ndjson'
+    lines = res.get_data().splitlines()
+    assert [json.loads(line)['content'] for line in lines] == ['comment 0', 'comment 1']
+
+def test_stream_comments_empty_and_missing_post(app, client):
+    post_id, _ = _thread(app, users=1, rounds=0)
+
+    assert json.loads(client.get(f'/social_media/{post_id}/comments').get_data()) == []
+    assert client.get('/social_media/9999/comments').status_code == 404
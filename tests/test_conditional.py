@@ -0,0 +1,119 @@
+from sqlalchemy import event
+
+from flaskr.extensions import db
+from flaskr.services import create_post, create_comment, vote_buffer
+
+from conftest import build_app, make_user, temp_id, auth_headers
+
+def _post(app) -> int:
+    with app.app_context():
+        author = make_user('author@example.com')
+        make_user('voter@example.com')
+        post_id = create_post(author, temp_id(), 'title', 'content')['post_id']
+        create_comment(author, post_id, 'first', temp_id())
+    return post_id
+
+def _revalidate(client, url, etag, **kwargs):
+    return client.get(url, headers={'If-None-Match': etag, **kwargs.pop('headers', {})}, **kwargs)
+
+def test_post_etag_changes_after_vote_in_same_second(app, client):
+    post_id = _post(app)
+    url = f'/social_media/post/{post_id}'
+    first = client.get(url)
+    etag = first.headers['ETag']
+    assert _revalidate(client, url, etag).status_code == 304
+
+    # Well within the second `updated_at` resolves to
+    voter = auth_headers(client, 'voter@example.com')
+    assert client.post(url, json={'vote': 'up'}, headers=voter).status_code == 200
+
+    res = _revalidate(client, url, etag)
+    assert res.status_code == 200
+    assert res.get_json()['up_votes'] == 1
+    assert res.headers['ETag'] != etag
+
+def test_comment_vote_changes_post_etag(app, client):
+    post_id = _post(app)
+    url = f'/social_media/post/{post_id}'
+    etag = client.get(url).headers['ETag']
+    comment_id = client.get(url).get_json()['comments']['items'][0]['comment_id']
+
+    voter = auth_headers(client, 'voter@example.com')
+    client.post(f'/social_media/comment/{comment_id}', json={'vote': 'down'}, headers=voter)
+
+    res = _revalidate(client, url, etag)
+    assert res.status_code == 200
+    assert res.get_json()['comments']['items'][0]['down_votes'] == 1
+
+def test_feed_etag_is_stable_until_a_write(app, client):
+    post_id = _post(app)
+    first = client.get('/social_media/')
+    etag = first.headers['ETag']
+    # Reads never seed counters, so the first tag holds
+    assert client.get('/social_media/').headers['ETag'] == etag
+    assert _revalidate(client, '/social_media/', etag).status_code == 304
+
+    voter = auth_headers(client, 'voter@example.com')
+    client.post(f'/social_media/post/{post_id}', json={'vote': 'up'}, headers=voter)
+
+    res = _revalidate(client, '/social_media/', etag)
+    assert res.status_code == 200
+    assert res.get_json()['items'][0]['up_votes'] == 1
+
+def test_comment_vote_changes_feed_etag(app, client):
+    _post(app)
+    etag = client.get('/social_media/').headers['ETag']
+    comment_id = client.get('/social_media/').get_json()['items'][0]['comments'][0]['comment_id']
+
+    voter = auth_headers(client, 'voter@example.com')
+    client.post(f'/social_media/comment/{comment_id}', json={'vote': 'up'}, headers=voter)
+
+    res = _revalidate(client, '/social_media/', etag)
+    assert res.status_code == 200
+    assert res.get_json()['items'][0]['comments'][0]['up_votes'] == 1
+
+def test_viewer_feed_revalidation_skips_vote_tables(app, client):
+    _post(app)
+    voter = auth_headers(client, 'voter@example.com')
+    etag = client.get('/social_media/?overlay=1', headers=voter).headers['ETag']
+
+    statements = []
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        res = _revalidate(client, '/social_media/?overlay=1', etag, headers=voter)
+    finally:
+        with app.app_context():
+            event.remove(db.engine, 'before_cursor_execute', record)
+    assert res.status_code == 304
+    # The viewer's votes come from the vote cache
+    assert not [s for s in statements if 'post_votes' in s or 'comment_votes' in s]
+
+def test_fresh_last_modified_is_not_sent(app, client):
+    post_id = _post(app)
+    res = client.get(f'/social_media/post/{post_id}')
+    # Written this second: a same-second write couldn't move it
+    assert res.headers.get('Last-Modified') is None
+
+def test_viewer_etag_follows_own_write_behind_vote(tmp_path):
+    app = build_app(tmp_path, VOTE_WRITE_BEHIND=True, VOTE_FLUSH_INTERVAL=3600)
+    client = app.test_client()
+    post_id = _post(app)
+    voter = auth_headers(client, 'voter@example.com')
+    etag = client.get('/social_media/', headers=voter).headers['ETag']
+
+    client.post(f'/social_media/post/{post_id}', json={'vote': 'up'}, headers=voter)
+
+    # Counters are still buffered, but the viewer's vote row is not
+    res = _revalidate(client, '/social_media/', etag, headers=voter)
+    assert res.status_code == 200
+    assert res.get_json()['items'][0]['user_vote'] == 'up'
+
+    anonymous = client.get('/social_media/').headers['ETag']
+    with app.app_context():
+        vote_buffer.flush()
+    res = _revalidate(client, '/social_media/', anonymous)
+    assert res.status_code == 200
+    assert res.get_json()['items'][0]['up_votes'] == 1
@@ -0,0 +1,14 @@
+from conftest import make_user
+
+def test_conditional_routes_keep_their_specs(client):
+    paths = client.get('/apispec_1.json').get_json()['paths']
+    assert 'get' in paths['/social_media/']
+    assert 'get' in paths['/social_media/post/{post_id}']
+
+def test_requests_load_specs_without_error(app, client):
+    # Specs are parsed before every request, so one bad path breaks every route
+    with app.app_context():
+        user_id = make_user('reader@example.com')
+    assert client.get('/social_media/').status_code == 200
+    assert client.get(f'/user/{user_id}').status_code == 200
+    assert client.get('/social_media/search', query_string={'q': 'anything'}).status_code == 200
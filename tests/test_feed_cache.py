@@ -0,0 +1,36 @@
+from flaskr.routes import social_media_routes
+from flaskr.services import create_post
+
+from conftest import make_user, temp_id, auth_headers
+
+PAGES = ('/social_media/?per_page=1&page=1', '/social_media/?per_page=1&page=2')
+
+def _count_renders(monkeypatch) -> list:
+    calls = []
+    render = social_media_routes.render_all_posts
+    def counting(**kwargs):
+        calls.append(kwargs['page'])
+        return render(**kwargs)
+    monkeypatch.setattr(social_media_routes, 'render_all_posts', counting)
+    return calls
+
+def test_vote_only_rebuilds_the_page_it_changes(app, client, monkeypatch):
+    with app.app_context():
+        author = make_user('author@example.com')
+        make_user('voter@example.com')
+        older = create_post(author, temp_id(), 'older', 'content')['post_id']
+        newer = create_post(author, temp_id(), 'newer', 'content')['post_id']
+    renders = _count_renders(monkeypatch)
+    # Newest first: `newer` is page 1, `older` page 2
+    assert [client.get(url).get_json()['items'][0]['post_id'] for url in PAGES] == [newer, older]
+    assert [client.get(url).status_code for url in PAGES] == [200, 200]
+    assert renders == [1, 2]
+
+    voter = auth_headers(client, 'voter@example.com')
+    client.post(f'/social_media/post/{older}', json={'vote': 'up'}, headers=voter)
+
+    first, second = (client.get(url).get_json() for url in PAGES)
+    assert second['items'][0]['up_votes'] == 1
+    # Page 1 is still served from the cache; only page 2 was rebuilt
+    assert first['items'][0]['post_id'] == newer
+    assert renders == [1, 2, 2]
@@ -0,0 +1,38 @@
+from flaskr.extensions import db
+from flaskr.models import Post
+from flaskr.models.user import UserDetail
+from flaskr.services import create_post, update_post
+
+from conftest import build_app, make_user, temp_id
+
+def _feed_item(client) -> dict:
+    return client.get('/social_media/').get_json()['items'][0]
+
+def test_same_second_edits_rerender_fragment(app, client):
+    with app.app_context():
+        user_id = make_user('author@example.com')
+        post_id = create_post(user_id, temp_id(), 'title', 'first')['post_id']
+    assert _feed_item(client)['content'] == 'first'
+
+    with app.app_context():
+        update_post(user_id, post_id, {'content': 'second'})
+    assert _feed_item(client)['content'] == 'second'
+
+    with app.app_context():
+        update_post(user_id, post_id, {'content': 'third'})
+        assert db.session.get(Post, post_id).version == 3
+    assert _feed_item(client)['content'] == 'third'
+
+def test_author_detail_change_rerenders_fragment(tmp_path):
+    # Whole feed pages are cached for a short TTL on their own; look past them
+    app = build_app(tmp_path, FEED_CACHE_ENABLED=False)
+    client = app.test_client()
+    with app.app_context():
+        user_id = make_user('author@example.com')
+        create_post(user_id, temp_id(), 'title', 'content')
+    assert _feed_item(client)['author']['details'] == {}
+
+    with app.app_context():
+        db.session.add(UserDetail(user_id=user_id, f_name='Ada', bio='hi'))
+        db.session.commit()
+    assert _feed_item(client)['author']['details']['f_name'] == 'Ada'
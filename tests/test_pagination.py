@@ -0,0 +1,25 @@
+from flaskr.services import create_post
+
+from conftest import make_user, temp_id
+
+def test_feed_cursors_walk_every_post_once(app, client):
+    with app.app_context():
+        author = make_user('author@example.com')
+        post_ids = [create_post(author, temp_id(), f'post {i}', 'content')['post_id'] for i in range(5)]
+
+    seen, pages, cursor = [], [], ''
+    while cursor is not None:
+        res = client.get('/social_media/', query_string={'per_page': 2, 'cursor': cursor})
+        assert res.status_code == 200
+        body = res.get_json()
+        pages.append(body)
+        seen += [post['post_id'] for post in body['items']]
+        cursor = body['pagination']['next_cursor']
+
+    # Newest first, no duplicates or gaps, and no totals in keyset mode
+    assert seen == post_ids[::-1]
+    assert 'total' not in pages[0]['pagination']
+    back = client.get('/social_media/', query_string={
+        'per_page': 2, 'cursor': pages[-1]['pagination']['prev_cursor']
+    }).get_json()
+    assert [post['post_id'] for post in back['items']] == seen[2:4]
@@ -0,0 +1,43 @@
+import pytest
+
+from flaskr.extensions import db
+
+from conftest import build_app, make_user, temp_id, auth_headers
+
+@pytest.fixture
+def replica_app(tmp_path):
+    # A replica that never catches up: its tables exist but stay empty
+    app = build_app(tmp_path, SQLALCHEMY_BINDS={'replica': f"sqlite:///{tmp_path / 'replica.db'}"})
+    with app.app_context():
+        db.metadata.create_all(db.engines['replica'])
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+    # init_app registered an (empty) metadata per bind on the shared `db`;
+    # later apps without the bind would fail create_all on it
+    db.metadatas.pop('replica', None)
+
+def test_writer_reads_own_writes_past_stale_replica(replica_app):
+    client = replica_app.test_client()
+    with replica_app.app_context():
+        author = make_user('author@example.com')
+    headers = auth_headers(client, 'author@example.com')
+    # Fill the shared feed cache from the replica first
+    assert client.get('/social_media/').get_json()['items'] == []
+
+    res = client.post(f'/social_media/{author}/post', headers=headers,
+                      json={'title': 'title', 'content': 'content', 'temp_id': temp_id()})
+    post_id = res.get_json()['post']['post_id']
+    client.post(f'/social_media/{author}/post/{post_id}/comment', headers=headers,
+                json={'content': 'comment', 'temp_id': temp_id()})
+
+    # The writer is pinned to the primary, shared-page overlay included
+    feed = client.get('/social_media/?overlay=1', headers=headers).get_json()
+    assert [post['post_id'] for post in feed['items']] == [post_id]
+    res = client.get(f'/social_media/{post_id}/comments', headers=headers)
+    assert [cmt['content'] for cmt in res.get_json()] == ['comment']
+
+    # Anonymous reads, streamed comments included, go to the stale replica
+    assert client.get('/social_media/').get_json()['items'] == []
+    assert client.get(f'/social_media/{post_id}/comments').status_code == 404
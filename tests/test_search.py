@@ -0,0 +1,79 @@
+from flaskr.extensions import db
+from flaskr.services import rebuild_search_index
+
+from conftest import make_user, temp_id, auth_headers
+
+def _hits(client, q, **args) -> list[tuple[str, int]]:
+    res = client.get('/social_media/search', query_string={'q': q, **args})
+    assert res.status_code == 200
+    return [
+        (hit['type'], hit['post']['post_id'] if hit['type'] == 'post' else hit['comment']['comment_id'])
+        for hit in res.get_json()['items']
+    ]
+
+def _write(app, client):
+    with app.app_context():
+        user_id = make_user('author@example.com')
+    headers = auth_headers(client, 'author@example.com')
+    post_id = client.post(f'/social_media/{user_id}/post', headers=headers, json={
+        'title': 'Sourdough starters', 'content': 'Feeding schedules', 'temp_id': temp_id()
+    }).get_json()['post']['post_id']
+    comment_id = client.post(f'/social_media/{user_id}/post/{post_id}/comment', headers=headers, json={
+        'content': 'Rye flour works wonders', 'temp_id': temp_id()
+    }).get_json()['comment']['comment_id']
+    return user_id, headers, post_id, comment_id
+
+def test_search_finds_new_content(app, client):
+    _, _, post_id, comment_id = _write(app, client)
+    # Stemmed: "starter" matches "starters"
+    assert _hits(client, 'starter') == [('post', post_id)]
+    assert _hits(client, 'rye') == [('comment', comment_id)]
+    assert _hits(client, 'rye', type='post') == []
+    assert _hits(client, 'baguette') == []
+
+def test_search_follows_edits(app, client):
+    user_id, headers, post_id, comment_id = _write(app, client)
+    client.put(f'/social_media/{user_id}/post/{post_id}', headers=headers,
+               json={'title': 'Baguette shaping'})
+    client.put(f'/social_media/{user_id}/comment/{comment_id}', headers=headers,
+               json={'content': 'Spelt works too'})
+    assert _hits(client, 'sourdough') == []
+    assert _hits(client, 'baguette') == [('post', post_id)]
+    assert _hits(client, 'rye') == []
+    assert _hits(client, 'spelt') == [('comment', comment_id)]
+
+def test_search_drops_deleted_content(app, client):
+    user_id, headers, post_id, comment_id = _write(app, client)
+    client.post(f'/social_media/{user_id}/post/{post_id}/comment', headers=headers,
+                json={'content': 'Rye again', 'temp_id': temp_id()})
+    assert client.delete(f'/social_media/comment/{comment_id}', headers=headers).status_code == 200
+    assert len(_hits(client, 'rye')) == 1
+    # Deleting the post takes its remaining comments with it
+    assert client.delete(f'/social_media/post/{post_id}', headers=headers).status_code == 200
+    assert _hits(client, 'rye') == []
+    assert _hits(client, 'sourdough') == []
+
+def test_search_validates_and_pages(app, client):
+    user_id, headers, _, _ = _write(app, client)
+    for i in range(3):
+        client.post(f'/social_media/{user_id}/post', headers=headers,
+                    json={'title': f'Crumb {i}', 'content': 'crumb', 'temp_id': temp_id()})
+    assert client.get('/social_media/search').status_code == 400
+    assert client.get('/social_media/search', query_string={'q': 'x', 'type': 'user'}).status_code == 400
+    # Only punctuation left: nothing to match
+    assert _hits(client, '!!!') == []
+
+    first = client.get('/social_media/search', query_string={'q': 'crumb', 'per_page': 2}).get_json()
+    rest = client.get('/social_media/search', query_string={
+        'q': 'crumb', 'per_page': 2, 'cursor': first['pagination']['next_cursor']
+    }).get_json()
+    ids = [hit['post']['post_id'] for hit in first['items'] + rest['items']]
+    assert len(ids) == len(set(ids)) == 3
+
+def test_rebuild_search_index(app, client):
+    _, _, post_id, _ = _write(app, client)
+    with app.app_context():
+        db.session.execute(db.text('DELETE FROM post_fts'))
+        db.session.commit()
+        assert rebuild_search_index() == (1, 1)
+    assert _hits(client, 'sourdough') == [('post', post_id)]
@@ -0,0 +1,46 @@
+from flaskr.models import Post
+from flaskr.extensions import db
+from flaskr.services import create_post, vote_buffer, reconcile_vote_counts
+
+from conftest import build_app, make_user, temp_id, auth_headers
+
+def _voted_post(tmp_path):
+    app = build_app(tmp_path, VOTE_WRITE_BEHIND=True, VOTE_FLUSH_INTERVAL=3600)
+    client = app.test_client()
+    with app.app_context():
+        author = make_user('author@example.com')
+        make_user('voter@example.com')
+        post_id = create_post(author, temp_id(), 'title', 'content')['post_id']
+    voter = auth_headers(client, 'voter@example.com')
+    res = client.post(f'/social_media/post/{post_id}', json={'vote': 'up'}, headers=voter)
+    # The response already counts the journaled delta
+    assert res.get_json()['up_votes'] == 1
+    return app, post_id
+
+def test_flush_applies_buffered_votes(tmp_path):
+    app, post_id = _voted_post(tmp_path)
+    with app.app_context():
+        assert db.session.get(Post, post_id).upvotes_cnt == 0
+        assert vote_buffer.flush() == 1
+        db.session.expire_all()
+        assert db.session.get(Post, post_id).upvotes_cnt == 1
+
+def test_deltas_survive_a_dead_worker(tmp_path):
+    app, post_id = _voted_post(tmp_path)
+    # The voting worker dies without flushing; a fresh one picks up the journal
+    restarted = build_app(tmp_path, VOTE_WRITE_BEHIND=True, VOTE_FLUSH_INTERVAL=3600)
+    with restarted.app_context():
+        assert vote_buffer.flush() == 1
+        post = db.session.get(Post, post_id)
+        assert (post.upvotes_cnt, post.score) == (1, 1)
+        assert vote_buffer.flush() == 0
+
+def test_reconcile_clears_the_journal(tmp_path):
+    app, post_id = _voted_post(tmp_path)
+    with app.app_context():
+        assert reconcile_vote_counts() == (1, 0)
+        # The vote row already counted it; flushing must not add it again
+        assert vote_buffer.flush() == 0
+        db.session.expire_all()
+        post = db.session.get(Post, post_id)
+        assert (post.upvotes_cnt, post.score) == (1, 1)
@@ -0,0 +1,24 @@
+from flaskr.services.vote_cache import UserVoteCache
+from flaskr.struct import VoteDirection
+
+def test_stale_read_does_not_overwrite_write_through():
+    cache = UserVoteCache()
+    read_version = cache.read_version()
+    # A vote commits and is written through while the read is in flight
+    cache.store(1, 'posts', {10: VoteDirection.UP})
+    cache.store(1, 'posts', {10: None}, read_version)
+    assert cache.lookup(1, 'posts', [10]) == ({10: VoteDirection.UP}, [])
+
+def test_stale_read_is_dropped_after_eviction():
+    cache = UserVoteCache()
+    read_version = cache.read_version()
+    cache.store(1, 'posts', {10: VoteDirection.UP})
+    cache.invalidate(1)
+    cache.store(1, 'posts', {10: None}, read_version)
+    assert cache.lookup(1, 'posts', [10]) == ({}, [10])
+
+def test_read_after_write_is_stored():
+    cache = UserVoteCache()
+    cache.store(1, 'posts', {10: VoteDirection.UP})
+    cache.store(1, 'comments', {20: VoteDirection.DOWN}, cache.read_version())
+    assert cache.lookup(1, 'comments', [20]) == ({20: VoteDirection.DOWN}, [])